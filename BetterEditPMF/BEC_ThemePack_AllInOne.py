@@ -19,11 +19,15 @@ from __future__ import annotations
 
 import os
 import json
+import math
 import time
+import hashlib
 from typing import Dict, Optional, Any
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
+import bec_state
+
 PMF_DIR = os.path.abspath(os.path.dirname(__file__))
 BASE_DIR = os.path.abspath(os.path.join(PMF_DIR, ".."))
 PLUGINS_DIR = os.path.join(BASE_DIR, "plugins")
@@ -203,21 +207,162 @@ THEMES: Dict[str, Dict[str, str]] = {
 }
 
 # ---------------------- state ----------------------
+_STATE = bec_state.store(STATE_JSON)
+
 def _load_state() -> dict:
-    if not os.path.isfile(STATE_JSON):
-        return {}
-    try:
-        with open(STATE_JSON, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        return {}
+    d = _STATE.load()
+    return d if isinstance(d, dict) else {}
 
 def _save_state(d: dict) -> None:
-    try:
-        with open(STATE_JSON, "w", encoding="utf-8") as f:
-            json.dump(d, f, indent=2, ensure_ascii=False)
-    except Exception:
-        pass
+    _STATE.save(d)
+
+# ---------------------- theme library (themes/ -> index, lazy QSS) ----------------------
+THEME_INDEX_JSON = os.path.join(DATA_DIR, "theme_index.json")
+THEME_EXTS = (".json", ".qss")
+LIB_QSS_KEEP = 16
+
+class _ThemeLibrary:
+    # persisted index of THEMES_DIR: key -> {file, label, hash, mtime_ns, size}
+    def __init__(self, root: str, index_path: str):
+        self.root = root
+        self._store = bec_state.store(index_path, compact=True)
+        self._index: Optional[Dict[str, dict]] = None
+        self._qss: Dict[tuple, str] = {}
+        self._scanned = False
+        self.clashes: list = []
+        self.stats = {"scans": 0, "parsed": 0, "loads": 0, "hits": 0}
+
+    def _entries(self) -> Dict[str, dict]:
+        if self._index is None:
+            d = self._store.load()
+            idx = d.get("themes") if isinstance(d, dict) else None
+            self._index = idx if isinstance(idx, dict) else {}
+        return self._index
+
+    def _key(self, name: str, taken: Dict[str, dict]) -> str:
+        stem, ext = os.path.splitext(name)
+        base = "-".join(stem.lower().split())
+        key, n = base, 1
+        while key in THEMES or key in taken:
+            n += 1
+            key = f"{base}-{ext[1:].lower()}" if n == 2 else f"{base}-{ext[1:].lower()}-{n - 1}"
+        if key != base:
+            owner = "built-in theme" if base in THEMES else taken[base]["file"]
+            self.clashes.append(f"{name} listed as {key} ({base} is {owner})")
+        return key
+
+    def _parse(self, path: str, st: os.stat_result) -> Optional[dict]:
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return None
+        self.stats["parsed"] += 1
+        label = os.path.splitext(os.path.basename(path))[0]
+        if path.lower().endswith(".json"):
+            try:
+                data = json.loads(raw.decode("utf-8"))
+            except Exception:
+                return None
+            if not isinstance(data, dict) or not (data.get("qss") or isinstance(data.get("config"), dict)):
+                return None
+            label = str(data.get("label") or label)
+        return {"file": os.path.basename(path), "label": label,
+                "hash": hashlib.sha1(raw).hexdigest()[:16], "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    def refresh(self) -> tuple:
+        old = self._entries()
+        by_file = {e["file"]: e for e in old.values()}
+        new: Dict[str, dict] = {}
+        added = changed = 0
+        self.clashes = []
+        try:
+            ents = sorted((d for d in os.scandir(self.root)
+                           if d.name.lower().endswith(THEME_EXTS) and d.is_file()), key=lambda d: d.name.lower())
+        except OSError:
+            ents = []
+        for d in ents:
+            st = d.stat()
+            e = by_file.get(d.name)
+            if e is None or e["mtime_ns"] != st.st_mtime_ns or e["size"] != st.st_size:
+                parsed = self._parse(d.path, st)
+                if parsed is None:
+                    continue
+                if e is None:
+                    added += 1
+                elif parsed["hash"] != e["hash"]:
+                    changed += 1
+                e = parsed
+            new[self._key(d.name, new)] = e
+        removed = len(set(by_file) - {e["file"] for e in new.values()})
+        self.stats["scans"] += 1
+        self._scanned = True
+        if new != old:
+            self._index = new
+            self._store.save({"themes": new})
+        return added, changed, removed
+
+    def items(self) -> list:
+        self.refresh()
+        return [(k, e["label"]) for k, e in self._entries().items()]
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def version(self, key: str) -> str:
+        e = self._entries().get(key)
+        return e["hash"] if e else ""
+
+    def label(self, key: str) -> Optional[str]:
+        e = self._entries().get(key)
+        return e["label"] if e else None
+
+    def qss(self, key: str) -> Optional[str]:
+        e = self._entries().get(key)
+        if e is None and not self._scanned:
+            self.refresh()
+            e = self._entries().get(key)
+        if e is None:
+            return None
+        path = os.path.join(self.root, e["file"])
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.refresh()
+            return None
+        if (st.st_mtime_ns, st.st_size) != (e["mtime_ns"], e["size"]):
+            self.refresh()
+            e = self._entries().get(key)
+            if e is None:
+                return None
+        ck = (key, e["hash"])
+        qss = self._qss.get(ck)
+        if qss is not None:
+            self.stats["hits"] += 1
+            return qss
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            if e["file"].lower().endswith(".json"):
+                data = json.loads(text)
+                text = data.get("qss") or _qss_from_custom(data.get("config") or {})
+        except Exception:
+            return None
+        self.stats["loads"] += 1
+        self._qss[ck] = text
+        if len(self._qss) > LIB_QSS_KEEP:
+            del self._qss[next(iter(self._qss))]
+        return text
+
+_LIBRARY = _ThemeLibrary(THEMES_DIR, THEME_INDEX_JSON)
+
+def _theme_qss(key: str) -> Optional[str]:
+    if key in THEMES:
+        return THEMES[key]["qss"]
+    return _LIBRARY.qss(key)
+
+def _theme_label(key: str) -> str:
+    return THEMES[key]["label"] if key in THEMES else (_LIBRARY.label(key) or key)
 
 # ---------------------- safe host wrappers ----------------------
 def _safe_register_command(host, **kwargs) -> bool:
@@ -247,26 +392,188 @@ def _boost_flags(app: QtWidgets.QApplication) -> None:
     except Exception:
         pass
 
+_PATCH_STATS: Dict[str, int] = {"events": 0, "widget_visits": 0, "icon_reads": 0, "windows": 0}
+
+# ---------------------- image pipeline (icon variants + pre-scaled bg image) ----------------------
+IMG_CACHE_DIR = os.path.join(DATA_DIR, "img_cache")
+ICON_SIZES = (16, 24, 32, 48, 64, 128, 256)
+
+_ICONS: Dict[str, Any] = {}
+_BG_DONE: set = set()
+_IMG_STATS: Dict[str, int] = {"bg_decodes": 0, "bg_mem_hits": 0, "bg_disk_hits": 0, "icon_variants": 0}
+_FRAMES: Dict[str, Any] = {}
+
+def _img_tag(path: str) -> Optional[str]:
+    try:
+        mt = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    h = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode("utf-8")).hexdigest()[:12]
+    return f"{h}-{mt}"
+
+def _img_prune(prefix: str, keep: set) -> None:
+    try:
+        for fn in os.listdir(IMG_CACHE_DIR):
+            if fn.startswith(prefix) and fn not in keep:
+                os.remove(os.path.join(IMG_CACHE_DIR, fn))
+    except OSError:
+        pass
+
+def _icon(icon_path: str) -> Optional[QtGui.QIcon]:
+    # each size is pre-scaled once into data/img_cache and read only when a window asks for it
+    tag = _img_tag(icon_path)
+    if tag is None:
+        return None
+    hit = _ICONS.get(icon_path)
+    if hit and hit[0] == tag:
+        return hit[1]
+    src = QtGui.QImageReader(icon_path).size()
+    side = max(src.width(), src.height()) if src.isValid() else ICON_SIZES[-1]
+    sizes = [n for n in ICON_SIZES if n <= side] or [ICON_SIZES[0]]
+    names = [f"icon-{tag}-{n}.png" for n in sizes]
+    files = [os.path.join(IMG_CACHE_DIR, n) for n in names]
+    ico = QtGui.QIcon()
+    if all(os.path.isfile(f) for f in files):
+        for n, f in zip(sizes, files):
+            ico.addFile(f, QtCore.QSize(n, n))
+    else:
+        img = QtGui.QImage(icon_path)
+        _PATCH_STATS["icon_reads"] += 1
+        if img.isNull():
+            return None
+        os.makedirs(IMG_CACHE_DIR, exist_ok=True)
+        for n, f in zip(sizes, files):
+            v = img.scaled(n, n, QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                           QtCore.Qt.TransformationMode.SmoothTransformation)
+            if v.save(f):
+                _IMG_STATS["icon_variants"] += 1
+            ico.addPixmap(QtGui.QPixmap.fromImage(v))
+        _img_prune("icon-" + tag.split("-")[0], set(names))
+    _ICONS[icon_path] = (tag, ico)
+    return ico
+
+PREVIEW_SAMPLE_NAME = "bec-preview-sample"
+
+def _top_windows(app: QtWidgets.QApplication) -> list:
+    return [w for w in app.topLevelWidgets() if w.objectName() != PREVIEW_SAMPLE_NAME]
+
 def _apply_icon(app: QtWidgets.QApplication, icon_path: str) -> bool:
     if not icon_path or not os.path.isfile(icon_path):
         return False
-    ico = QtGui.QIcon(icon_path)
-    app.setWindowIcon(ico)
-    for w in app.topLevelWidgets():
+    ico = _icon(icon_path)
+    if ico is None:
+        return False
+    key = ico.cacheKey()
+    if app.windowIcon().cacheKey() != key:
+        app.setWindowIcon(ico)
+    for w in _top_windows(app):
         try:
-            w.setWindowIcon(ico)
+            if w.isWindow() and w.windowIcon().cacheKey() != key:
+                w.setWindowIcon(ico)
         except Exception:
             pass
     return True
 
-def _apply_stylesheet(app: QtWidgets.QApplication, qss: str) -> None:
-    tops = list(app.topLevelWidgets())
+def _bg_target() -> tuple:
+    # (logical w, logical h, integer scale) of the primary screen
+    scr = QtGui.QGuiApplication.primaryScreen()
+    if scr is None:
+        return (1920, 1080, 1)
+    sz = scr.size()
+    return (sz.width(), sz.height(), max(1, math.ceil(scr.devicePixelRatio())))
+
+def _bg_file(path: str) -> str:
+    # file for QSS url(): a copy pre-scaled to the screen (plus an @Nx variant), or path itself
+    tag = _img_tag(path)
+    if tag is None:
+        return path
+    w, h, n = _bg_target()
+    base = f"bg-{tag}-{w}x{h}"
+    out = os.path.join(IMG_CACHE_DIR, base + ".png")
+    if base in _BG_DONE:
+        _IMG_STATS["bg_mem_hits"] += 1
+        return out
+    hi = os.path.join(IMG_CACHE_DIR, f"{base}@{n}x.png") if n > 1 else out
+    if os.path.isfile(out) and os.path.isfile(hi):
+        _IMG_STATS["bg_disk_hits"] += 1
+        _BG_DONE.add(base)
+        return out
+    reader = QtGui.QImageReader(path)
+    src = reader.size()
+    if src.isValid() and src.width() <= w and src.height() <= h and n == 1:
+        return path
+    img = reader.read()
+    _IMG_STATS["bg_decodes"] += 1
+    if img.isNull():
+        return path
+    keep = QtCore.Qt.AspectRatioMode.KeepAspectRatio
+    smooth = QtCore.Qt.TransformationMode.SmoothTransformation
+    os.makedirs(IMG_CACHE_DIR, exist_ok=True)
+    lo = img.scaled(w, h, keep, smooth) if img.width() > w or img.height() > h else img
+    hi_img = img.scaled(w * n, h * n, keep, smooth) if img.width() > w * n or img.height() > h * n else img
+    if not lo.save(out) or (n > 1 and not hi_img.save(hi)):
+        return path
+    prefix = "bg-" + tag.split("-")[0]
+    _img_prune(prefix, {base + ".png", os.path.basename(hi)})
+    _BG_DONE.difference_update([b for b in _BG_DONE if b.startswith(prefix)])
+    _BG_DONE.add(base)
+    return out
+
+def _frame_probe(w: QtWidgets.QWidget, frames: int = 30) -> Dict[str, Any]:
+    ms = []
+    for _ in range(max(1, frames)):
+        t0 = time.perf_counter()
+        w.repaint()
+        ms.append((time.perf_counter() - t0) * 1000)
+    ms.sort()
+    _FRAMES.clear()
+    _FRAMES.update({"window": type(w).__name__, "frames": len(ms), "avg": sum(ms) / len(ms),
+                    "p95": ms[int(0.95 * (len(ms) - 1))], "max": ms[-1]})
+    return dict(_FRAMES)
+
+# ---------------------- stylesheet apply ----------------------
+_APPLY_TIMES: list = []
+APPLY_TIMES_KEEP = 50
+
+_FUSION_SET = False
+
+def _fusion_active(app: QtWidgets.QApplication) -> bool:
+    try:
+        st = app.style()
+        if st.metaObject().className() == "QStyleSheetStyle":
+            return _FUSION_SET
+        return (st.name() if hasattr(st, "name") else st.objectName()).lower() == "fusion"
+    except Exception:
+        return False
+
+def _scope_windows(app: QtWidgets.QApplication, scope: str) -> list:
+    # "active", or top-level windows whose class or objectName matches
+    tops = [w for w in _top_windows(app) if w.isWindow()]
+    if scope == "active":
+        w = app.activeWindow() or next((t for t in tops if t.isVisible()), None)
+        return [w] if w is not None else []
+    names = {n.strip().lower() for n in scope.split(",") if n.strip()}
+    return [w for w in tops if type(w).__name__.lower() in names or w.metaObject().className().lower() in names
+            or (w.objectName() or "").lower() in names]
+
+def _apply_stylesheet(app: QtWidgets.QApplication, qss: str, scope: str = "", label: str = "") -> float:
+    # returns the apply time in ms; scope="" restyles the whole app
+    global _FUSION_SET
+    t0 = time.perf_counter()
+    tops = _scope_windows(app, scope) if scope else _top_windows(app)
     for w in tops:
         try: w.setUpdatesEnabled(False)
         except Exception: pass
     try:
-        app.setStyle("Fusion")
-        app.setStyleSheet(qss)
+        if not _fusion_active(app):
+            app.setStyle("Fusion")
+            _FUSION_SET = True
+        if scope:
+            for w in tops:
+                if w.styleSheet() != qss:
+                    w.setStyleSheet(qss)
+        elif app.styleSheet() != qss:
+            app.setStyleSheet(qss)
     finally:
         for w in tops:
             try:
@@ -274,50 +581,88 @@ def _apply_stylesheet(app: QtWidgets.QApplication, qss: str) -> None:
                 w.update()
             except Exception:
                 pass
+    ms = (time.perf_counter() - t0) * 1000
+    _APPLY_TIMES.append((label or "?", ms))
+    del _APPLY_TIMES[:-APPLY_TIMES_KEEP]
+    return ms
+
+def _patch_label(lab: QtWidgets.QLabel) -> None:
+    # Removes "-ish" / "WinXP-ish" visible label by replacing known strings.
+    _PATCH_STATS["widget_visits"] += 1
+    t = (lab.text() or "").strip()
+    low = t.lower()
+    if "winxp-ish" in low or "theme-ish" in low or low.endswith("-ish"):
+        new = t
+        new = new.replace("WinXP-ish", "BEC-Style")
+        new = new.replace("winxp-ish", "BEC-Style")
+        new = new.replace("Theme-ish", "")
+        new = new.replace("theme-ish", "")
+        new = new.replace("-ish", "")
+        new = " ".join(new.split()).strip("• -")
+        # hide if it becomes empty
+        if not new:
+            lab.hide()
+        else:
+            lab.setText(new)
+
+def _patch_title_edit(w: QtWidgets.QWidget) -> bool:
+    # "Text soll in der Box sein": find a QLineEdit near top and set placeholder with subtitle
+    edits = [e for e in w.findChildren(QtWidgets.QLineEdit) if e.isVisible()]
+    _PATCH_STATS["widget_visits"] += len(edits)
+    if not edits:
+        return False
+    # pick the widest
+    edits.sort(key=lambda e: e.width(), reverse=True)
+    title_edit = edits[0]
+    # if placeholder empty, set a modern line
+    ph = title_edit.placeholderText().strip()
+    if not ph:
+        title_edit.setPlaceholderText("All in 1 • BEC-Style • Terminal • Plugins")
+    # optional: if there is a label that looks like subtitle, hide it and migrate into placeholder
+    for lab in w.findChildren(QtWidgets.QLabel):
+        _PATCH_STATS["widget_visits"] += 1
+        t = (lab.text() or "").strip()
+        if ("terminal" in t.lower() and "plugins" in t.lower()) or ("v" in t.lower() and "plugins" in t.lower()):
+            # move into placeholder, then hide label
+            title_edit.setPlaceholderText(t.replace("WinXP-ish", "BEC-Style").replace("-ish", ""))
+            lab.hide()
+            break
+    return True
 
 def _try_patch_header_text(app: QtWidgets.QApplication) -> None:
-    # Removes "-ish" / "WinXP-ish" visible label by scanning labels & replacing known strings.
     # Also tries to move subtitle into the title input placeholder ("text in der box").
-    for w in app.topLevelWidgets():
+    for w in _top_windows(app):
         for lab in w.findChildren(QtWidgets.QLabel):
-            t = (lab.text() or "").strip()
-            low = t.lower()
-            if "winxp-ish" in low or "theme-ish" in low or low.endswith("-ish"):
-                new = t
-                new = new.replace("WinXP-ish", "BEC-Style")
-                new = new.replace("winxp-ish", "BEC-Style")
-                new = new.replace("Theme-ish", "")
-                new = new.replace("theme-ish", "")
-                new = new.replace("-ish", "")
-                new = " ".join(new.split()).strip("• -")
-                # hide if it becomes empty
-                if not new:
-                    lab.hide()
-                else:
-                    lab.setText(new)
-
-        # "Text soll in der Box sein": find a QLineEdit near top and set placeholder with subtitle
-        # heuristic: first QLineEdit that is wide
-        edits = [e for e in w.findChildren(QtWidgets.QLineEdit) if e.isVisible()]
-        if edits:
-            # pick the widest
-            edits.sort(key=lambda e: e.width(), reverse=True)
-            title_edit = edits[0]
-            # if placeholder empty, set a modern line
-            ph = title_edit.placeholderText().strip()
-            if not ph:
-                title_edit.setPlaceholderText("All in 1 • BEC-Style • Terminal • Plugins")
-            # optional: if there is a label that looks like subtitle, hide it and migrate into placeholder
-            for lab in w.findChildren(QtWidgets.QLabel):
-                t = (lab.text() or "").strip()
-                if ("terminal" in t.lower() and "plugins" in t.lower()) or ("v" in t.lower() and "plugins" in t.lower()):
-                    # move into placeholder, then hide label
-                    title_edit.setPlaceholderText(t.replace("WinXP-ish", "BEC-Style").replace("-ish", ""))
-                    lab.hide()
-                    break
+            _patch_label(lab)
+        _patch_title_edit(w)
 
 # ---------------------- custom theme (json -> qss) ----------------------
+_QSS_CACHE: Dict[Any, str] = {}
+QSS_CACHE_MAX = 64
+
+def _cfg_key(cfg: dict) -> Any:
+    try:
+        return tuple(sorted(cfg.items()))
+    except TypeError:
+        return hashlib.sha1(json.dumps(cfg, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _custom_key(cfg: dict) -> Any:
+    key = _cfg_key(cfg)
+    if cfg.get("bg_image"):
+        # url() points at a pre-scaled copy of the bg image
+        key = (key, _img_tag(cfg["bg_image"]), _bg_target())
+    return key
+
 def _qss_from_custom(cfg: dict) -> str:
+    key = _custom_key(cfg)
+    qss = _QSS_CACHE.get(key)
+    if qss is None:
+        qss = _QSS_CACHE[key] = _gen_custom_qss(cfg)
+        if len(_QSS_CACHE) > QSS_CACHE_MAX:
+            del _QSS_CACHE[next(iter(_QSS_CACHE))]
+    return qss
+
+def _gen_custom_qss(cfg: dict) -> str:
     # simple generator; editor writes these configs
     bg = cfg.get("bg", "#0E0F12")
     fg = cfg.get("fg", "#ECECEC")
@@ -328,7 +673,8 @@ def _qss_from_custom(cfg: dict) -> str:
 
     bgimg_qss = ""
     if bgimg and os.path.isfile(bgimg):
-        bgimg_qss = f"QMainWindow {{ background-image: url('{bgimg.replace('\\','/')}'); background-position:center; background-repeat:no-repeat; }}\n"
+        url = _bg_file(bgimg).replace("\\", "/")
+        bgimg_qss = f"QMainWindow {{ background-image: url('{url}'); background-position:center; background-repeat:no-repeat; }}\n"
 
     return f"""
 * {{ font-family: "{font}"; font-size: 10.5pt; }}
@@ -363,6 +709,71 @@ QTabBar::tab:selected {{ background: rgba(255,255,255,0.14); }}
 {bgimg_qss}
 """
 
+# ---------------------- offscreen preview ----------------------
+PREVIEW_SIZE = (420, 300)
+PREVIEW_DEBOUNCE_MS = 150
+PREVIEW_CACHE_MAX = 32
+
+_PREVIEWS: Dict[Any, QtGui.QPixmap] = {}
+_PREVIEW_STATS: Dict[str, float] = {"renders": 0, "hits": 0, "render_ms": 0.0}
+
+class _PreviewSample(QtWidgets.QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setObjectName(PREVIEW_SAMPLE_NAME)
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_DontShowOnScreen, True)
+        self.setFixedSize(*PREVIEW_SIZE)
+        tabs = QtWidgets.QTabWidget()
+        page = QtWidgets.QWidget()
+        form = QtWidgets.QGridLayout(page)
+        form.addWidget(QtWidgets.QLabel("Command:"), 0, 0)
+        form.addWidget(QtWidgets.QLineEdit("theme apply bec-style"), 0, 1, 1, 2)
+        combo = QtWidgets.QComboBox()
+        combo.addItems(["bec-style", "midnight", "snow"])
+        form.addWidget(combo, 1, 0)
+        spin = QtWidgets.QSpinBox()
+        spin.setValue(14)
+        form.addWidget(spin, 1, 1)
+        form.addWidget(QtWidgets.QPushButton("Run"), 1, 2)
+        log = QtWidgets.QPlainTextEdit("> plugins\nBEC ThemePack loaded\n> theme list")
+        form.addWidget(log, 2, 0, 1, 3)
+        tabs.addTab(page, "Terminal")
+        tabs.addTab(QtWidgets.QWidget(), "Editor")
+        lay = QtWidgets.QVBoxLayout(self)
+        lay.addWidget(tabs)
+        self.show()
+
+    def render_qss(self, qss: str) -> QtGui.QPixmap:
+        # lift the app sheet for the grab so the sample shows qss alone
+        app = QtWidgets.QApplication.instance()
+        live = app.styleSheet() if app is not None else ""
+        if live:
+            app.setStyleSheet("")
+        try:
+            self.setStyleSheet(qss)
+            return self.grab()
+        finally:
+            if live:
+                app.setStyleSheet(live)
+
+_SAMPLE: Optional[_PreviewSample] = None
+
+def _render_preview(key: Any, qss: str) -> QtGui.QPixmap:
+    global _SAMPLE
+    pm = _PREVIEWS.get(key)
+    if pm is not None:
+        _PREVIEW_STATS["hits"] += 1
+        return pm
+    t0 = time.perf_counter()
+    if _SAMPLE is None:
+        _SAMPLE = _PreviewSample()
+    pm = _PREVIEWS[key] = _SAMPLE.render_qss(qss)
+    if len(_PREVIEWS) > PREVIEW_CACHE_MAX:
+        del _PREVIEWS[next(iter(_PREVIEWS))]
+    _PREVIEW_STATS["renders"] += 1
+    _PREVIEW_STATS["render_ms"] += (time.perf_counter() - t0) * 1000
+    return pm
+
 # ---------------------- Theme Editor UI ----------------------
 class ThemeEditor(QtWidgets.QDialog):
     def __init__(self, app: QtWidgets.QApplication, parent=None):
@@ -388,6 +799,8 @@ class ThemeEditor(QtWidgets.QDialog):
         self.cmb_presets.addItem("Built-in: Midnight", "midnight")
         self.cmb_presets.addItem("Built-in: Snow (Light)", "snow")
         self.cmb_presets.addItem("Custom Generator (this editor)", "__custom__")
+        for k, label in _LIBRARY.items():
+            self.cmb_presets.addItem(f"Library: {label}", k)
 
         self.btn_apply = QtWidgets.QPushButton("Apply Live")
         self.btn_save_theme = QtWidgets.QPushButton("Save Preset (JSON)")
@@ -412,6 +825,15 @@ class ThemeEditor(QtWidgets.QDialog):
         self.qss_view.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
         self.qss_view.setPlaceholderText("Generated QSS preview…")
 
+        self.preview = QtWidgets.QLabel()
+        self.preview.setFixedSize(*PREVIEW_SIZE)
+        self.preview.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+
+        self._debounce = QtCore.QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(PREVIEW_DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._update_qss)
+
         top = QtWidgets.QHBoxLayout()
         top.addWidget(QtWidgets.QLabel("Preset:"))
         top.addWidget(self.cmb_presets, 1)
@@ -433,14 +855,17 @@ class ThemeEditor(QtWidgets.QDialog):
         lay = QtWidgets.QVBoxLayout(self)
         lay.addLayout(top)
         lay.addLayout(grid)
-        lay.addWidget(self.qss_view, 1)
+        body = QtWidgets.QHBoxLayout()
+        body.addWidget(self.qss_view, 1)
+        body.addWidget(self.preview, 0, QtCore.Qt.AlignmentFlag.AlignTop)
+        lay.addLayout(body, 1)
 
         self.cmb_presets.currentIndexChanged.connect(self._preset_changed)
         self.btn_apply.clicked.connect(self._apply)
         self.btn_bg.clicked.connect(lambda: self._pick_color("bg"))
         self.btn_fg.clicked.connect(lambda: self._pick_color("fg"))
         self.btn_ac.clicked.connect(lambda: self._pick_color("accent"))
-        self.spin_radius.valueChanged.connect(self._update_qss)
+        self.spin_radius.valueChanged.connect(self._schedule_update)
         self.btn_font.clicked.connect(self._pick_font)
         self.btn_bgimg.clicked.connect(self._pick_bgimg)
         self.btn_icon.clicked.connect(self._pick_icon)
@@ -450,37 +875,67 @@ class ThemeEditor(QtWidgets.QDialog):
 
         self._preset_changed()
 
+        self._warm = [k for k in THEMES if (k, PREVIEW_SIZE) not in _PREVIEWS]
+        self._warmer = QtCore.QTimer(self)
+        self._warmer.timeout.connect(self._warm_next)
+        if self._warm:
+            self._warmer.start(0)
+
+    def _warm_next(self):
+        if not self._warm:
+            self._warmer.stop()
+            return
+        key = self._warm.pop(0)
+        _render_preview((key, PREVIEW_SIZE), THEMES[key]["qss"])
+
     def _preset_changed(self):
         key = self.cmb_presets.currentData()
-        if key in THEMES:
-            qss = THEMES[key]["qss"]
-            self.qss_view.setPlainText(qss)
-        else:
+        self._debounce.stop()
+        if key == "__custom__":
+            self._update_qss()
+            return
+        qss = _theme_qss(key)
+        if qss is None:
+            self.qss_view.setPlainText("")
+            self.preview.setText("Theme file is gone or unreadable.")
+            return
+        self.qss_view.setPlainText(qss)
+        pkey = (key, PREVIEW_SIZE) if key in THEMES else (key, _LIBRARY.version(key), PREVIEW_SIZE)
+        self.preview.setPixmap(_render_preview(pkey, qss))
+
+    def _schedule_update(self, *_):
+        self._debounce.start()
+
+    def _flush_update(self):
+        if self._debounce.isActive():
+            self._debounce.stop()
             self._update_qss()
 
     def _update_qss(self):
         self.cfg["radius"] = int(self.spin_radius.value())
         qss = _qss_from_custom(self.cfg)
-        self.qss_view.setPlainText(qss)
+        if self.qss_view.toPlainText() != qss:
+            self.qss_view.setPlainText(qss)
+        self.preview.setPixmap(_render_preview((_custom_key(self.cfg), PREVIEW_SIZE), qss))
 
     def _pick_color(self, which: str):
         cur = QtGui.QColor(self.cfg.get(which, "#ffffff"))
         col = QtWidgets.QColorDialog.getColor(cur, self, f"Pick {which}")
         if col.isValid():
             self.cfg[which] = col.name()
-            self._update_qss()
+            self._schedule_update()
 
     def _pick_font(self):
         ok, font = QtWidgets.QFontDialog.getFont(self.font(), self, "Pick Font")
         if ok:
             self.cfg["font"] = font.family()
-            self._update_qss()
+            self._schedule_update()
 
     def _pick_bgimg(self):
         fn, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Pick background image", PMF_DIR, "Images (*.png *.jpg *.jpeg *.webp)")
         if fn:
             self.cfg["bg_image"] = fn
-            self._update_qss()
+            self._schedule_update()
 
     def _pick_icon(self):
         fn, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Pick icon (png)", PMF_DIR, "PNG (*.png)")
@@ -488,13 +943,15 @@ class ThemeEditor(QtWidgets.QDialog):
             self.cfg["icon"] = fn
 
     def _apply(self):
+        self._flush_update()
         key = self.cmb_presets.currentData()
-        if key in THEMES:
-            qss = THEMES[key]["qss"]
-        else:
-            qss = self.qss_view.toPlainText()
+        custom = key == "__custom__"
+        qss = self.qss_view.toPlainText() if custom else _theme_qss(key)
+        if qss is None:
+            QtWidgets.QMessageBox.warning(self, "Apply", f"Theme '{key}' is no longer in {THEMES_DIR}.")
+            return
 
-        _apply_stylesheet(self._app, qss)
+        _apply_stylesheet(self._app, qss, label="custom" if custom else key)
 
         # icon
         icon_path = self.cfg.get("icon") or ICON_DEFAULT
@@ -504,18 +961,22 @@ class ThemeEditor(QtWidgets.QDialog):
         _try_patch_header_text(self._app)
 
         # persist
-        if key in THEMES:
-            _save_state({"type": "builtin", "name": key, "icon": icon_path})
-        else:
+        if custom:
             _save_state({"type": "customgen", "config": self.cfg, "icon": icon_path})
+        else:
+            _save_state({"type": "builtin" if key in THEMES else "library", "name": key, "icon": icon_path})
 
     def _save_json(self):
         fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Save preset (json)", THEMES_DIR, "JSON (*.json)")
         if not fn:
             return
+        self._flush_update()
         data = {"type": "bec_preset", "config": self.cfg, "qss": self.qss_view.toPlainText()}
         with open(fn, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        for k, label in _LIBRARY.items():
+            if self.cmb_presets.findData(k) < 0:
+                self.cmb_presets.addItem(f"Library: {label}", k)
 
     def _load_json(self):
         fn, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Load preset (json)", THEMES_DIR, "JSON (*.json)")
@@ -528,8 +989,10 @@ class ThemeEditor(QtWidgets.QDialog):
             if isinstance(cfg, dict):
                 self.cfg.update(cfg)
                 self.spin_radius.setValue(int(self.cfg.get("radius", 14)))
+                self._debounce.stop()
                 qss = data.get("qss") or _qss_from_custom(self.cfg)
                 self.qss_view.setPlainText(qss)
+                self.preview.setPixmap(_render_preview(("qss", hashlib.sha1(qss.encode("utf-8")).hexdigest(), PREVIEW_SIZE), qss))
         except Exception as e:
             QtWidgets.QMessageBox.warning(self, "Load error", str(e))
 
@@ -537,31 +1000,124 @@ class ThemeEditor(QtWidgets.QDialog):
         fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export QSS", THEMES_DIR, "QSS (*.qss)")
         if not fn:
             return
+        self._flush_update()
         with open(fn, "w", encoding="utf-8") as f:
             f.write(self.qss_view.toPlainText())
 
-# ---------------------- runtime patch timer (early icon + text fixes) ----------------------
-class _EarlyPatch(QtCore.QObject):
-    def __init__(self, app: QtWidgets.QApplication):
-        super().__init__()
+# ---------------------- runtime patcher (early icon + text fixes) ----------------------
+EARLY_PATCH_SECONDS = 6.0
+PATCH_DONE = "_bec_patched"
+PATCH_PENDING = "_bec_title_pending"
+
+class _WidgetPatcher(QtCore.QObject):
+    """App-wide event filter: patches each new window/label once, on Show / ChildAdded / WindowTitleChange."""
+
+    _TYPES = (QtCore.QEvent.Type.Show, QtCore.QEvent.Type.ChildAdded, QtCore.QEvent.Type.WindowTitleChange)
+
+    def __init__(self, app: QtWidgets.QApplication, icon_path: str):
+        super().__init__(app)
         self.app = app
-        self.start = time.time()
-        self._tick = QtCore.QTimer(self)
-        self._tick.setInterval(250)
-        self._tick.timeout.connect(self._run)
-        self._tick.start()
-
-    def _run(self):
-        # run for first ~6 seconds; helps beat Windows icon caching / late window creation
+        self.icon = _icon(icon_path) if icon_path and os.path.isfile(icon_path) else None
+        self.started = time.time()
+        app.installEventFilter(self)
+        QtCore.QTimer.singleShot(int(EARLY_PATCH_SECONDS * 1000), self.stop)
+        for w in _top_windows(app):
+            if w.isVisible():
+                self._window(w)
+                for lab in w.findChildren(QtWidgets.QLabel):
+                    self._label(lab)
+
+    def stop(self):
+        self.app.removeEventFilter(self)
+        _PATCH_STATS["filter_ms"] = int((time.time() - self.started) * 1000)
+
+    def eventFilter(self, obj, ev):
+        t = ev.type()
+        if t not in self._TYPES:
+            return False
+        _PATCH_STATS["events"] += 1
         try:
-            st = _load_state()
-            icon = st.get("icon") or ICON_DEFAULT
-            _apply_icon(self.app, icon)
-            _try_patch_header_text(self.app)
+            if isinstance(obj, QtWidgets.QWidget) and obj.window().objectName() == PREVIEW_SAMPLE_NAME:
+                return False
+            if t == QtCore.QEvent.Type.ChildAdded:
+                child = ev.child()
+                if isinstance(child, QtWidgets.QLineEdit) and isinstance(obj, QtWidgets.QWidget) and obj.window().property(PATCH_PENDING):
+                    win = obj.window()
+                    QtCore.QTimer.singleShot(0, lambda: self._title(win))
+            elif isinstance(obj, QtWidgets.QLabel):
+                self._label(obj)
+            elif isinstance(obj, QtWidgets.QWidget) and obj.isWindow():
+                self._window(obj)
         except Exception:
             pass
-        if time.time() - self.start > 6.0:
-            self._tick.stop()
+        return False
+
+    def _label(self, lab):
+        if not lab.property(PATCH_DONE):
+            lab.setProperty(PATCH_DONE, True)
+            _patch_label(lab)
+
+    def _window(self, w):
+        if w.property(PATCH_DONE):
+            return
+        w.setProperty(PATCH_DONE, True)
+        _PATCH_STATS["windows"] += 1
+        if self.icon is not None:
+            w.setWindowIcon(self.icon)
+        w.setProperty(PATCH_PENDING, True)
+        self._title(w)
+
+    def _title(self, w):
+        if w.property(PATCH_PENDING) and _patch_title_edit(w):
+            w.setProperty(PATCH_PENDING, False)
+
+def _patch_stats(app: QtWidgets.QApplication) -> str:
+    s = _PATCH_STATS
+    ticks = int(EARLY_PATCH_SECONDS / 0.25)
+    per_tick = sum(2 * len(w.findChildren(QtWidgets.QLabel)) + len(w.findChildren(QtWidgets.QLineEdit))
+                   for w in _top_windows(app))
+    return (
+        f"startup patcher: {s['events']} filtered events, {s['windows']} windows, "
+        f"{s['widget_visits']} widget visits\n"
+        f"disk reads: {_STATE.reads} state file, {s['icon_reads']} icon decodes "
+        f"({_STATE.hits} state loads served from memory)\n"
+        f"old {ticks}-tick timer on the current widget tree: ~{ticks * per_tick} widget visits, "
+        f"{ticks} state reads, {ticks} icon decodes"
+        + (f"\nfilter active for {s['filter_ms']} ms" if "filter_ms" in s else "\nfilter still active")
+        + _apply_stats()
+        + _preview_stats()
+        + _image_stats()
+        + _library_stats()
+    )
+
+def _apply_stats() -> str:
+    if not _APPLY_TIMES:
+        return ""
+    ms = [t for _, t in _APPLY_TIMES]
+    last = _APPLY_TIMES[-1]
+    return (f"\ntheme switches: {len(ms)} (last {last[0]} {last[1]:.1f} ms, "
+            f"avg {sum(ms) / len(ms):.1f} ms, max {max(ms):.1f} ms); "
+            f"{len(_QSS_CACHE)} generated QSS cached")
+
+def _image_stats() -> str:
+    i = _IMG_STATS
+    out = (f"\nimages: {i['bg_decodes']} bg decodes, {i['bg_mem_hits']} memory / {i['bg_disk_hits']} disk cache hits, "
+           f"{i['icon_variants']} icon variants written")
+    if _FRAMES:
+        out += f"; last frame probe {_FRAMES['window']} avg {_FRAMES['avg']:.2f} ms, p95 {_FRAMES['p95']:.2f} ms"
+    return out
+
+def _library_stats() -> str:
+    ls = _LIBRARY.stats
+    return (f"\nlibrary: {len(_LIBRARY)} indexed, {ls['scans']} scans, {ls['parsed']} files parsed, "
+            f"{ls['loads']} QSS loads ({ls['hits']} from memory)")
+
+def _preview_stats() -> str:
+    p = _PREVIEW_STATS
+    if not p["renders"]:
+        return ""
+    return (f"\neditor previews: {int(p['renders'])} rendered (avg {p['render_ms'] / p['renders']:.1f} ms), "
+            f"{int(p['hits'])} served from cache")
 
 # ---------------------- plugin entry: register(host) ----------------------
 def register(host):
@@ -578,43 +1134,85 @@ def register(host):
 
     try:
         if st.get("type") == "builtin" and st.get("name") in THEMES:
-            _apply_stylesheet(app, THEMES[st["name"]]["qss"])
+            _apply_stylesheet(app, THEMES[st["name"]]["qss"], label=st["name"])
+        elif st.get("type") == "library" and st.get("name"):
+            qss = _LIBRARY.qss(st["name"])
+            if qss is not None:
+                _apply_stylesheet(app, qss, label=st["name"])
         elif st.get("type") == "customgen" and isinstance(st.get("config"), dict):
             cfg = st["config"]
-            _apply_stylesheet(app, _qss_from_custom(cfg))
+            _apply_stylesheet(app, _qss_from_custom(cfg), label="custom")
     except Exception:
         pass
 
-    # early patcher (icon + text)
-    _EarlyPatch(app)
+    _WidgetPatcher(app, icon_path)
 
     def theme_cmd(ctx, argv):
         if not argv or argv[0].lower() in ("help", "-h", "/?"):
             items = "\n".join([f"{k:18}  {THEMES[k]['label']}" for k in THEMES])
             return (
                 "theme list\n"
-                "theme apply <key>\n"
+                "theme apply <key|library-key> [--scope active|<WindowClass,...>]\n"
                 "theme editor\n"
                 "theme icon <path_to_png>\n"
+                "theme stats\n"
+                "theme frames [n]\n"
                 "\nBuilt-in:\n" + items
             )
 
         sub = argv[0].lower()
 
         if sub == "list":
-            return "\n".join([f"{k:18}  {THEMES[k]['label']}" for k in THEMES])
+            out = [f"{k:18}  {THEMES[k]['label']}" for k in THEMES]
+            lib = _LIBRARY.items()
+            if lib:
+                out.append(f"\nLibrary ({_LIBRARY.root}):")
+                out += [f"{k:18}  {label}" for k, label in lib]
+                out += [f"note: {c}" for c in _LIBRARY.clashes]
+            return "\n".join(out)
 
         if sub == "apply":
+            scope = ""
+            if "--scope" in argv:
+                i = argv.index("--scope")
+                scope = argv[i + 1] if i + 1 < len(argv) else ""
+                argv = argv[:i] + argv[i + 2:]
+                if not scope:
+                    return "Usage: theme apply <key|library-key> [--scope active|<WindowClass,...>]"
             if len(argv) < 2:
-                return "Usage: theme apply <key>"
+                return "Usage: theme apply <key|library-key> [--scope active|<WindowClass,...>]"
             key = argv[1].lower()
-            if key not in THEMES:
+            qss = _theme_qss(key)
+            if qss is None:
                 return "Unknown key. theme list"
-            _apply_stylesheet(app, THEMES[key]["qss"])
-            _apply_icon(app, icon_path)
+            if scope:
+                n = len(_scope_windows(app, scope))
+                if not n:
+                    return f"No window matches scope '{scope}'."
+                ms = _apply_stylesheet(app, qss, scope=scope, label=key)
+                return f"OK: {_theme_label(key)} on {n} window(s) ({ms:.1f} ms)"
+            ms = _apply_stylesheet(app, qss, label=key)
+            cur_icon = _load_state().get("icon") or icon_path
+            _apply_icon(app, cur_icon)
             _try_patch_header_text(app)
-            _save_state({"type": "builtin", "name": key, "icon": icon_path})
-            return f"OK: {THEMES[key]['label']}"
+            _save_state({"type": "builtin" if key in THEMES else "library", "name": key, "icon": cur_icon})
+            return f"OK: {_theme_label(key)} ({ms:.1f} ms)"
+
+        if sub == "stats":
+            return _patch_stats(app)
+
+        if sub == "frames":
+            try:
+                n = int(argv[1]) if len(argv) > 1 else 30
+            except ValueError:
+                return "Usage: theme frames [n]"
+            w = app.activeWindow() or next((t for t in _top_windows(app)
+                                            if isinstance(t, QtWidgets.QMainWindow) and t.isVisible()), None)
+            if w is None:
+                return "No visible window to probe."
+            f = _frame_probe(w, n)
+            return (f"{f['window']}: {f['frames']} repaints, avg {f['avg']:.2f} ms, "
+                    f"p95 {f['p95']:.2f} ms, max {f['max']:.2f} ms")
 
         if sub == "editor":
             ThemeEditor(app).exec()
@@ -647,7 +1245,7 @@ def register(host):
     # quick tool buttons (if supported)
     def _btn(key: str):
         def go():
-            _apply_stylesheet(app, THEMES[key]["qss"])
+            _apply_stylesheet(app, THEMES[key]["qss"], label=key)
             _try_patch_header_text(app)
             st = _load_state()
             _save_state({"type": "builtin", "name": key, "icon": st.get("icon") or ICON_DEFAULT})
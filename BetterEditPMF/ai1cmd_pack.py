@@ -3,17 +3,22 @@ from __future__ import annotations
 import os
 import sys
 import re
+import copy
 import json
 import time
+import bisect
+import functools
 import math
-import base64
 import hashlib
 import random
+import queue
 import socket
-import platform
+import threading
 import subprocess
-from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import bec_state
 
 PACK_NAME = "BetterEditPMF AI1cmd Pack (REAL)"
 AUTHOR = "BEC-Studios"
@@ -61,39 +66,100 @@ def _read_text(path: str, limit: int = 8000) -> str:
         pass
     return data
 
+def _split_flags(argv: List[str], valued: Tuple[str, ...] = ()) -> Tuple[List[str], Dict[str, object]]:
+    args: List[str] = []
+    flags: Dict[str, object] = {}
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a.startswith("--") and len(a) > 2:
+            key = a[2:].lower()
+            if key in valued and i + 1 < len(argv):
+                flags[key] = argv[i + 1]
+                i += 2
+                continue
+            flags[key] = True
+        else:
+            args.append(a)
+        i += 1
+    return args, flags
+
+def _int_flag(flags: Dict[str, object], key: str, default: int) -> int:
+    try:
+        return int(flags.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+def _pump_ui() -> None:
+    qtw = sys.modules.get("PySide6.QtWidgets")
+    if qtw is None or threading.current_thread() is not threading.main_thread():
+        return
+    try:
+        qtw.QApplication.processEvents()
+    except Exception:
+        pass
+
+def _emit(ctx, text: str) -> bool:
+    for attr in ("print", "write", "out"):
+        fn = getattr(ctx, attr, None)
+        if callable(fn):
+            try:
+                fn(text)
+                _pump_ui()
+                return True
+            except Exception:
+                return False
+    return False
+
 def _write_text(path: str, text: str) -> str:
     os.makedirs(os.path.dirname(os.path.abspath(path)) or ".", exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         f.write(text)
     return "OK"
 
-def _sha256_file(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
 def _vt_link(sha256: str) -> str:
     # VirusTotal file page
     return f"https://www.virustotal.com/gui/file/{sha256}"
 
+_MANIFEST = bec_state.store(MANIFEST_PATH, default=lambda: {"apps": {}})
+
 def _load_manifest() -> dict:
-    if not os.path.exists(MANIFEST_PATH):
-        return {"apps": {}}
-    try:
-        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "apps" not in data or not isinstance(data["apps"], dict):
-            return {"apps": {}}
-        return data
-    except Exception:
+    data = _MANIFEST.load()
+    if not isinstance(data, dict) or not isinstance(data.get("apps"), dict):
         return {"apps": {}}
+    return data
+
+def _app_path(entry) -> str:
+    # entries are {"path", "sha256", "size", "mtime_ns"}; older ones are a bare path
+    return entry.get("path", "") if isinstance(entry, dict) else str(entry)
+
+def _app_pin(path: str) -> dict:
+    st = os.stat(path)
+    digest, _ = _sha256_cached(path)
+    _hash_cache_save()
+    return {"path": path, "sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _app_verify(entry) -> Tuple[bool, str]:
+    path = _app_path(entry)
+    if not os.path.isfile(path):
+        return False, f"File not found: {path}"
+    if not isinstance(entry, dict) or not entry.get("sha256"):
+        return True, "unverified (added before hashes were pinned; re-add to pin)"
+    st = os.stat(path)
+    if st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns"):
+        return True, "ok (stat)"
+    digest = _sha256_file(path)
+    if digest != entry["sha256"]:
+        return False, (
+            f"BLOCKED: {path} changed since it was added.\n"
+            f"pinned SHA256: {entry['sha256']}\ncurrent SHA256: {digest}\n"
+            f"VirusTotal: {_vt_link(digest)}\nVerify it, then re-add with: IDSPcommands add <name> <path>"
+        )
+    entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+    return True, "ok (rehashed)"
 
 def _save_manifest(data: dict) -> None:
-    os.makedirs(SERVER_DIR, exist_ok=True)
-    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    _MANIFEST.save(data)
 
 def _which(exe: str) -> Optional[str]:
     paths = os.environ.get("PATH", "").split(os.pathsep)
@@ -130,79 +196,1906 @@ SHELLS: Dict[str, Optional[List[str]]] = {
     "gitbash":    None,  # resolved
 }
 
+_CTX_STATE: Dict[int, dict] = {}
+
 def _get_state(ctx) -> dict:
+    key = id(getattr(ctx, "app", ctx))
+    if key in _CTX_STATE:
+        return copy.deepcopy(_CTX_STATE[key])
     try:
         s = ctx.state_get("bettereditpmf", {})
         if isinstance(s, dict):
+            _CTX_STATE[key] = copy.deepcopy(s)
             return s
     except Exception:
         pass
     return {}
 
 def _set_state(ctx, data: dict) -> None:
+    key = id(getattr(ctx, "app", ctx))
+    if _CTX_STATE.get(key) == data:
+        return
     try:
         ctx.state_set("bettereditpmf", data)
+        _CTX_STATE[key] = copy.deepcopy(data)
     except Exception:
         pass
 
+# ---------------- text search engine (file-findtext) ----------------
+FINDTEXT_CHUNK = 1024 * 1024
+FINDTEXT_LIMIT = 200
+
+def _default_workers() -> int:
+    return min(32, (os.cpu_count() or 4) + 4)
+
+def _scan_file(path: str, needle: bytes, first_only: bool = False, chunk_size: int = FINDTEXT_CHUNK) -> List[Tuple[int, str]]:
+    # chunked scan; the tail of each chunk is carried over so matches across chunks are found
+    hits: List[Tuple[int, str]] = []
+    with open(path, "rb") as f:
+        chunk = f.read(chunk_size)
+        if len(chunk) < chunk_size and needle not in chunk:
+            return hits
+        keep = max(len(needle) - 1, 0)
+        line_no = 1
+        resume = 0
+        last_line = 0
+        buf = b""
+        while chunk:
+            buf += chunk
+            pos = resume
+            at, ln = 0, line_no
+            while True:
+                i = buf.find(needle, pos)
+                if i < 0:
+                    break
+                ln += buf.count(b"\n", at, i)
+                at = i
+                end = buf.find(b"\n", i)
+                if end < 0:
+                    end = len(buf)
+                if ln != last_line:
+                    start = buf.rfind(b"\n", 0, i) + 1
+                    text = buf[start:end].decode("utf-8", errors="replace").strip()
+                    hits.append((ln, text[:240]))
+                    last_line = ln
+                    if first_only:
+                        return hits
+                pos = end + 1
+            cut = max(0, len(buf) - keep)
+            line_no += buf.count(b"\n", 0, cut)
+            resume = max(0, pos - cut)
+            buf = buf[cut:]
+            chunk = f.read(chunk_size)
+    return hits
+
+class _TextSearch:
+    """Directory walk + file scans on a thread pool (or inline with one worker); hits land in a queue."""
+
+    def __init__(self, root: str, text: str, ext: str, lines: bool = False,
+                 limit: int = FINDTEXT_LIMIT, workers: int = 0):
+        self.root = os.path.abspath(root)
+        self.needle = text.encode("utf-8")
+        self.ext = "" if ext in ("*", ".", "") else ext.lower()
+        self.lines = lines
+        self.limit = limit
+        self.workers = workers or min(32, os.cpu_count() or 1)
+        self.hits: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.count = 0
+        self.truncated = False
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stop = threading.Event()
+        self._pool = None
+
+    def _submit(self, fn: Callable, arg) -> None:
+        with self._lock:
+            self._pending += 1
+        self._pool.submit(self._task, fn, arg)
+
+    def _task(self, fn: Callable, arg) -> None:
+        try:
+            if not self._stop.is_set():
+                fn(arg)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if self._pending == 0:
+                    self.hits.put(None)
+
+    def _list(self, d: str) -> Tuple[List[str], List[str]]:
+        dirs: List[str] = []
+        files: List[str] = []
+        with os.scandir(d) as it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        dirs.append(e.path)
+                    elif e.name.lower().endswith(self.ext):
+                        files.append(e.path)
+                except OSError:
+                    pass
+        return dirs, files
+
+    def _walk(self, d: str) -> None:
+        dirs, files = self._list(d)
+        for sub in dirs:
+            self._submit(self._walk, sub)
+        for i in range(0, len(files), 64):
+            self._submit(self._scan, files[i:i + 64])
+
+    def _scan(self, paths: List[str]) -> None:
+        for path in paths:
+            if self._stop.is_set():
+                return
+            try:
+                found = _scan_file(path, self.needle, first_only=not self.lines)
+            except OSError:
+                continue
+            for ln, text in found:
+                with self._lock:
+                    if self.count >= self.limit:
+                        self.truncated = True
+                        self._stop.set()
+                        return
+                    self.count += 1
+                self.hits.put(f"{path}:{ln}:{text}" if self.lines else path)
+
+    def _run_inline(self, emit: Callable[[str], None]) -> None:
+        stack = [self.root]
+        while stack and not self._stop.is_set():
+            if _job_cancelled():
+                break
+            try:
+                dirs, files = self._list(stack.pop())
+            except OSError:
+                continue
+            stack.extend(reversed(dirs))
+            self._scan(files)
+            try:
+                while True:
+                    emit(self.hits.get_nowait())
+            except queue.Empty:
+                pass
+
+    def _run_pool(self, emit: Callable[[str], None]) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="findtext")
+        try:
+            self._submit(self._walk, self.root)
+            while True:
+                try:
+                    line = self.hits.get(timeout=0.1)
+                except queue.Empty:
+                    line = ""
+                if line is None:
+                    break
+                if line:
+                    emit(line)
+                if _job_cancelled():
+                    self._stop.set()
+        finally:
+            self._stop.set()
+            self._pool.shutdown(wait=True)
+
+    def run(self, on_hit: Optional[Callable[[str], None]] = None) -> List[str]:
+        got: List[str] = []
+
+        def emit(line: str) -> None:
+            got.append(line)
+            if on_hit:
+                on_hit(line)
+        if self.workers <= 1:
+            self._run_inline(emit)
+        else:
+            self._run_pool(emit)
+        return got
+
+# ---------------- hashing (file-sha256 / IDSPcommands scan) ----------------
+HASH_CACHE_PATH = os.path.join(DATA_DIR, "hash_cache.json")
+HASH_CACHE_MAX = 50000
+HASH_MMAP_MIN = 4 * 1024 * 1024
+HASH_SLICE = 8 * 1024 * 1024
+
+_HASH_CACHE: Dict[str, list] = {}
+_HASH_CACHE_LOADED = False
+_HASH_LOCK = threading.Lock()
+_HASH_STORE = bec_state.store(HASH_CACHE_PATH, compact=True)
+
+def _stat_sig(st: os.stat_result) -> Tuple[int, int, int]:
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+def _hash_cache_load() -> None:
+    global _HASH_CACHE_LOADED
+    if _HASH_CACHE_LOADED:
+        return
+    with _HASH_LOCK:
+        if _HASH_CACHE_LOADED:
+            return
+        data = _HASH_STORE.load()
+        if isinstance(data, dict):
+            merged = dict(data)
+            merged.update(_HASH_CACHE)
+            _HASH_CACHE.clear()
+            _HASH_CACHE.update(merged)
+        _HASH_CACHE_LOADED = True
+
+def _hash_cache_snapshot() -> Dict[str, list]:
+    with _HASH_LOCK:
+        if len(_HASH_CACHE) > HASH_CACHE_MAX:
+            for k in list(_HASH_CACHE)[: len(_HASH_CACHE) - HASH_CACHE_MAX]:
+                del _HASH_CACHE[k]
+        return dict(_HASH_CACHE)
+
+def _hash_cache_save() -> None:
+    _HASH_STORE.touch(_hash_cache_snapshot)
+
+def _sha256_raw(path: str, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        if size >= HASH_MMAP_MIN:
+            import mmap
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for i in range(0, size, HASH_SLICE):
+                        h.update(view[i:i + HASH_SLICE])
+                finally:
+                    view.release()
+        else:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+def _sha256_cached(path: str) -> Tuple[str, bool]:
+    _hash_cache_load()
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    sig = _stat_sig(st)
+    with _HASH_LOCK:
+        rec = _HASH_CACHE.get(key)
+    if rec and tuple(rec[:3]) == sig:
+        return rec[3], True
+    digest = _sha256_raw(key, st.st_size)
+    with _HASH_LOCK:
+        _HASH_CACHE.pop(key, None)
+        _HASH_CACHE[key] = [*sig, digest]
+    return digest, False
+
+def _sha256_file(path: str) -> str:
+    digest, hit = _sha256_cached(path)
+    if not hit:
+        _hash_cache_save()
+    return digest
+
+def _sha256_many(paths: List[str], workers: int = 0) -> Tuple[Dict[str, str], int]:
+    from concurrent.futures import ThreadPoolExecutor
+    out: Dict[str, str] = {}
+    hits = 0
+
+    def one(p: str) -> Tuple[str, str, bool]:
+        try:
+            d, hit = _sha256_cached(p)
+            return p, d, hit
+        except Exception as e:
+            return p, f"ERROR: {e}", False
+
+    with ThreadPoolExecutor(max_workers=workers or _default_workers(), thread_name_prefix="sha256") as pool:
+        for p, d, hit in pool.map(one, paths):
+            out[p] = d
+            hits += hit
+    if hits < len(paths):
+        _hash_cache_save()
+    return out, hits
+
+# ---------------- listing (file-ls / file-tree) ----------------
+LS_PAGE = 400
+TREE_MAX_PER_DIR = 200
+
+LS_STAT_TTL = 3.0
+
+_LS_CURSORS: Dict[Tuple[str, str], Tuple[int, list, float]] = {}
+
+def _ls_rows(path: str, sort: str = "name") -> list:
+    key = (os.path.abspath(path), sort)
+    mtime = os.stat(key[0]).st_mtime_ns
+    need_stat = sort in ("size", "mtime")
+    hit = _LS_CURSORS.get(key)
+    if hit is not None and hit[0] == mtime and (not need_stat or time.time() - hit[2] < LS_STAT_TTL):
+        return hit[1]
+    rows = []
+    with os.scandir(key[0]) as it:
+        for e in it:
+            try:
+                is_dir = e.is_dir()
+            except OSError:
+                is_dir = False
+            size = mt = 0
+            if need_stat:
+                try:
+                    st = e.stat()
+                    size, mt = st.st_size, st.st_mtime
+                except OSError:
+                    pass
+            rows.append((e.name, is_dir, size, mt))
+    if sort == "size":
+        rows.sort(key=lambda r: (-r[2], r[0]))
+    elif sort == "mtime":
+        rows.sort(key=lambda r: (-r[3], r[0]))
+    else:
+        rows.sort(key=lambda r: r[0])
+    if len(_LS_CURSORS) >= 16:
+        _LS_CURSORS.pop(next(iter(_LS_CURSORS)))
+    _LS_CURSORS[key] = (mtime, rows, time.time())
+    return rows
+
+def _iter_tree(root: str, depth: int, max_per_dir: int = TREE_MAX_PER_DIR):
+    yield root
+    stack = [_tree_level(root, depth, "", max_per_dir)]
+    while stack:
+        nxt = next(stack[-1], None)
+        if nxt is None:
+            stack.pop()
+            continue
+        line, child = nxt
+        yield line
+        if child is not None:
+            stack.append(_tree_level(*child, max_per_dir))
+
+def _tree_level(path: str, d: int, prefix: str, max_per_dir: int):
+    if d < 0:
+        return
+    try:
+        with os.scandir(path) as it:
+            items = sorted(((e.name, e.is_dir()) for e in it), key=lambda r: r[0])
+    except OSError:
+        return
+    shown = items if max_per_dir <= 0 else items[:max_per_dir]
+    for i, (name, is_dir) in enumerate(shown):
+        last = i == len(shown) - 1
+        line = prefix + ("└─ " if last else "├─ ") + name + ("/" if is_dir else "")
+        child = None
+        if is_dir and d > 0:
+            child = (os.path.join(path, name), d - 1, prefix + ("   " if last else "│  "))
+        yield line, child
+    if len(shown) < len(items):
+        yield prefix + f"…(trimmed {len(items) - len(shown)})…", None
+
+# ---------------- folder sizes (file-size / file-du) ----------------
+DIRSIZE_CACHE_MAX = 50000
+DIRSIZE_TTL = 30.0
+
+_DIRSIZE_CACHE: OrderedDict[str, Tuple[int, int, int, List[str], float]] = OrderedDict()
+_DIRSIZE_LOCK = threading.Lock()
+
+def _dir_own(path: str, fresh: bool = False) -> Tuple[int, int, int, List[str], float]:
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return (0, 0, 0, [], 0.0)
+    now = time.time()
+    with _DIRSIZE_LOCK:
+        rec = _DIRSIZE_CACHE.get(path)
+        if rec is not None and rec[0] == mtime and now - rec[4] < DIRSIZE_TTL and not fresh:
+            _DIRSIZE_CACHE.move_to_end(path)
+            return rec
+    own = 0
+    count = 0
+    subs: List[str] = []
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        subs.append(e.path)
+                    elif e.is_file(follow_symlinks=False):
+                        own += e.stat(follow_symlinks=False).st_size
+                        count += 1
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    rec = (mtime, own, count, subs, now)
+    with _DIRSIZE_LOCK:
+        _DIRSIZE_CACHE[path] = rec
+        _DIRSIZE_CACHE.move_to_end(path)
+        while len(_DIRSIZE_CACHE) > DIRSIZE_CACHE_MAX:
+            _DIRSIZE_CACHE.popitem(last=False)
+    return rec
+
+def _dir_sizes(root: str, workers: int = 0, fresh: bool = False) -> Tuple[Dict[str, int], int]:
+    from concurrent.futures import ThreadPoolExecutor
+    root = os.path.abspath(root)
+    recs: Dict[str, Tuple[int, int, int, List[str], float]] = {}
+    level = [root]
+    with ThreadPoolExecutor(max_workers=workers or _default_workers(), thread_name_prefix="dirsize") as pool:
+        while level:
+            nxt: List[str] = []
+            for d, rec in zip(level, pool.map(lambda d: _dir_own(d, fresh), level)):
+                recs[d] = rec
+                nxt.extend(rec[3])
+            level = nxt
+    totals: Dict[str, int] = {}
+    for d in sorted(recs, key=len, reverse=True):
+        totals[d] = recs[d][1] + sum(totals.get(s, 0) for s in recs[d][3])
+    return totals, sum(r[2] for r in recs.values())
+
+# ---------------- filename index (file-findname / file-index) ----------------
+INDEX_DIR = os.path.join(DATA_DIR, "name_index")
+INDEX_REFRESH_EVERY = 2.0
+
+def _index_path(root: str) -> str:
+    key = hashlib.sha1(os.path.normcase(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(INDEX_DIR, f"{key}.json")
+
+def _is_glob(pat: str) -> bool:
+    return any(c in pat for c in "*?[")
+
+class _NameIndex:
+    """Per-root filename index: {reldir: [mtime, [subdirs], [files]]}, name tables kept sorted."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.path = _index_path(self.root)
+        self._store = bec_state.store(self.path, compact=True)
+        self.dirs: Dict[str, list] = {}
+        self.built = 0.0
+        self.checked = 0.0
+        self._table: Optional[List[Tuple[str, str]]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        data = self._store.load()
+        if not isinstance(data, dict) or data.get("root") != self.root:
+            return False
+        try:
+            self.dirs = data.get("dirs") or {}
+            self.built = float(data.get("built", 0))
+        except (TypeError, ValueError):
+            return False
+        self._table = None
+        return True
+
+    def save(self, now: bool = False) -> None:
+        self._store.save({"root": self.root, "built": self.built, "dirs": self.dirs}, now=now)
+
+    def drop(self) -> bool:
+        _NAME_INDEXES.pop(self.root, None)
+        return self._store.remove()
+
+    def _abs(self, rel: str) -> str:
+        return self.root if not rel else os.path.join(self.root, rel)
+
+    def _scan_dir(self, rel: str) -> List[str]:
+        p = self._abs(rel)
+        subs: List[str] = []
+        files: List[str] = []
+        try:
+            mtime = os.stat(p).st_mtime
+            with os.scandir(p) as it:
+                for e in it:
+                    try:
+                        (subs if e.is_dir(follow_symlinks=False) else files).append(e.name)
+                    except OSError:
+                        pass
+        except OSError:
+            self.dirs.pop(rel, None)
+            return []
+        subs.sort()
+        files.sort()
+        self.dirs[rel] = [mtime, subs, files]
+        self._table = None
+        return [os.path.join(rel, s) if rel else s for s in subs]
+
+    def _scan_tree(self, rel: str) -> None:
+        stack = [rel]
+        while stack:
+            stack.extend(self._scan_dir(stack.pop()))
+
+    def _forget(self, rel: str) -> None:
+        pre = rel + os.sep
+        for k in [k for k in self.dirs if k == rel or k.startswith(pre)]:
+            del self.dirs[k]
+        self._table = None
+
+    def build(self) -> None:
+        self.dirs = {}
+        self._scan_tree("")
+        self.built = self.checked = time.time()
+        self.save(now=True)
+
+    def refresh(self, force: bool = False) -> int:
+        with self._lock:
+            return self._refresh(force)
+
+    def _refresh(self, force: bool) -> int:
+        now = time.time()
+        if not force and now - self.checked < INDEX_REFRESH_EVERY:
+            return 0
+        self.checked = now
+        changed = 0
+        for rel in sorted(self.dirs):
+            rec = self.dirs.get(rel)
+            if rec is None:
+                continue
+            try:
+                mtime = os.stat(self._abs(rel)).st_mtime
+            except OSError:
+                self._forget(rel)
+                changed += 1
+                continue
+            if mtime == rec[0]:
+                continue
+            old_subs = set(rec[1])
+            self._scan_dir(rel)
+            new_subs = set(self.dirs.get(rel, [0, [], []])[1])
+            for s in old_subs - new_subs:
+                self._forget(os.path.join(rel, s) if rel else s)
+            for s in new_subs - old_subs:
+                self._scan_tree(os.path.join(rel, s) if rel else s)
+            changed += 1
+        if changed:
+            self.save()
+        return changed
+
+    def table(self) -> List[Tuple[str, str]]:
+        if self._table is None:
+            rows = []
+            for rel, (_, _, files) in self.dirs.items():
+                base = self._abs(rel)
+                rows.extend((fn.lower(), os.path.join(base, fn)) for fn in files)
+            rows.sort()
+            self._table = rows
+        return self._table
+
+    def query(self, pat: str, mode: str = "substr", under: str = "", limit: int = 200) -> Tuple[List[str], bool]:
+        import fnmatch
+        pat = pat.lower()
+        with self._lock:
+            rows = self.table()
+        under = os.path.join(os.path.abspath(under), "") if under else ""
+        if mode == "prefix":
+            i = bisect.bisect_left(rows, (pat, ""))
+            cands = []
+            while i < len(rows) and rows[i][0].startswith(pat):
+                cands.append(rows[i])
+                i += 1
+        elif mode == "glob":
+            rx = re.compile(fnmatch.translate(pat))
+            cands = [r for r in rows if rx.match(r[0])]
+        else:
+            cands = [r for r in rows if pat in r[0]]
+        hits = [p for _, p in cands if not under or p.startswith(under)]
+        return hits[:limit], len(hits) > limit
+
+    def stats(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self.dirs), sum(len(r[2]) for r in self.dirs.values())
+
+_NAME_INDEXES: Dict[str, _NameIndex] = {}
+
+def _get_index(root: str) -> Optional[_NameIndex]:
+    root = os.path.abspath(root)
+    probe = root
+    while True:
+        idx = _NAME_INDEXES.get(probe)
+        if idx is None and os.path.isfile(_index_path(probe)):
+            idx = _NameIndex(probe)
+            if idx.load():
+                idx = _NAME_INDEXES.setdefault(probe, idx)
+            else:
+                idx = None
+        if idx is not None:
+            return idx
+        parent = os.path.dirname(probe)
+        if parent == probe:
+            break
+        probe = parent
+    return None
+
+def _build_index(root: str) -> _NameIndex:
+    idx = _NameIndex(root)
+    idx.build()
+    _NAME_INDEXES[idx.root] = idx
+    return idx
+
+# ---------------- tail / follow ----------------
+TAIL_BLOCK = 64 * 1024
+FOLLOW_MAX_BYTES = 256 * 1024
+
+def _tail_lines(path: str, n: int, block: int = TAIL_BLOCK) -> str:
+    if n <= 0:
+        return ""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        if pos == 0:
+            return ""
+        f.seek(pos - 1)
+        need = n + (1 if f.read(1) == b"\n" else 0)
+        parts: List[bytes] = []
+        found = 0
+        while pos > 0 and found < need:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            found += chunk.count(b"\n")
+            parts.append(chunk)
+    data = b"".join(reversed(parts))
+    if found >= need:
+        cut = len(data)
+        for _ in range(need):
+            cut = data.rfind(b"\n", 0, cut)
+        data = data[cut + 1:]
+    return data.decode("utf-8", errors="replace")
+
+_FOLLOW: Dict[str, Tuple[int, int]] = {}
+
+def _follow_poll(path: str) -> Tuple[str, str]:
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    note = ""
+    if key not in _FOLLOW:
+        _FOLLOW[key] = (st.st_size, st.st_ino)
+        return "", ""
+    off, ino = _FOLLOW[key]
+    if st.st_ino != ino:
+        off, note = 0, "(file rotated, reading new file from start)"
+    elif st.st_size < off:
+        off, note = 0, "(file truncated, reading from start)"
+    if st.st_size == off:
+        _FOLLOW[key] = (off, st.st_ino)
+        return "", note
+    with open(key, "rb") as f:
+        f.seek(off)
+        data = f.read(min(st.st_size - off, FOLLOW_MAX_BYTES))
+    nl = data.rfind(b"\n")
+    if nl >= 0 and len(data) < FOLLOW_MAX_BYTES:
+        data = data[:nl + 1]
+    elif nl < 0 and len(data) < FOLLOW_MAX_BYTES:
+        data = b""
+    _FOLLOW[key] = (off + len(data), st.st_ino)
+    return data.decode("utf-8", errors="replace"), note
+
+# ---------------- port scan engine (net-scan) ----------------
+COMMON_PORTS = [21, 22, 23, 25, 53, 80, 110, 143, 443, 445, 3306, 5432, 6379, 8080, 8443, 27017, 1883, 9000, 9090, 9200]
+SCAN_MAX_HOSTS = 4096
+SCAN_MAX_PROBES = 200000
+
+def _parse_ports(spec: str) -> List[int]:
+    # "common" | "22,80,8000-8010"
+    if not spec or spec.lower() == "common":
+        return list(COMMON_PORTS)
+    ports: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            a, b = part.split("-", 1)
+            ports.extend(range(int(a), int(b) + 1))
+        else:
+            ports.append(int(part))
+    if not ports or any(p < 1 or p > 65535 for p in ports):
+        raise ValueError("ports must be 1-65535")
+    return sorted(set(ports))
+
+def _parse_targets(spec: str) -> List[str]:
+    if "/" not in spec:
+        return [spec]
+    import ipaddress
+    net = ipaddress.ip_network(spec, strict=False)
+    if net.num_addresses > SCAN_MAX_HOSTS + 2:
+        raise ValueError(f"network too large (max {SCAN_MAX_HOSTS} hosts)")
+    hosts = [str(h) for h in net.hosts()]
+    return hosts or [str(net.network_address)]
+
+class _PortScan:
+    """asyncio connect() sweep on its own thread; results come back through a queue.
+
+    Runs its own event loop so it works whether or not the host already drives one.
+    """
+
+    def __init__(self, hosts: List[str], ports: List[int], concurrency: int = 200, timeout: float = 1.0):
+        self.hosts = hosts
+        self.ports = ports
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.results: "queue.Queue[Tuple[str, int, str, float]]" = queue.Queue()
+        self.stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def _probe(self, host: str, port: int) -> None:
+        import asyncio
+        t0 = time.perf_counter()
+        try:
+            _, w = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+            state = "open"
+            w.close()
+            try:
+                await w.wait_closed()
+            except Exception:
+                pass
+        except asyncio.TimeoutError:
+            state = "filtered"
+        except OSError:
+            state = "closed"
+        except Exception:
+            state = "error"
+        self.results.put((host, port, state, (time.perf_counter() - t0) * 1000))
+
+    async def _worker(self, pending) -> None:
+        for host, port in pending:
+            if self.stop.is_set():
+                return
+            await self._probe(host, port)
+
+    async def _main(self) -> None:
+        import asyncio
+        pending = ((h, p) for h in self.hosts for p in self.ports)
+        n = min(self.concurrency, len(self.hosts) * len(self.ports))
+        await asyncio.gather(*(self._worker(pending) for _ in range(n)))
+
+    def start(self) -> None:
+        import asyncio
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="net-scan", daemon=True)
+        self._thread.start()
+
+    def run(self, on_result: Optional[Callable[[Tuple[str, int, str, float]], None]] = None) -> List[Tuple[str, int, str, float]]:
+        got = []
+        self.start()
+        while True:
+            if _job_cancelled():
+                self.stop.set()
+                break
+            alive = self._thread.is_alive()
+            try:
+                r = self.results.get(timeout=0.05)
+            except queue.Empty:
+                if not alive:
+                    break
+                continue
+            got.append(r)
+            if on_result:
+                on_result(r)
+        return got
+
+def _scan_table(results: List[Tuple[str, int, str, float]], elapsed: float) -> str:
+    by_host: Dict[str, List[int]] = {}
+    counts = {"open": 0, "closed": 0, "filtered": 0, "error": 0}
+    for h, p, state, _ in results:
+        counts[state] = counts.get(state, 0) + 1
+        if state == "open":
+            by_host.setdefault(h, []).append(p)
+    out = [f"{'HOST':<40} OPEN PORTS"]
+    for h in sorted(by_host):
+        out.append(f"{h:<40} {', '.join(str(p) for p in sorted(by_host[h]))}")
+    if not by_host:
+        out.append("(no open ports)")
+    out.append(
+        f"\n{len(results)} probes in {elapsed:.2f}s — open {counts['open']}, closed {counts['closed']}, "
+        f"filtered {counts['filtered']}, error {counts['error']}"
+    )
+    return "\n".join(out)
+
+# ---------------- HTTP client (net-httpget / net-headers) ----------------
+HTTP_CACHE_DIR = os.path.join(DATA_DIR, "http_cache")
+HTTP_CACHE_MAX = 32 * 1024 * 1024
+HTTP_ITEM_MAX = 2 * 1024 * 1024
+HTTP_TIMEOUT = 8
+
+_HTTP_SESSION = None
+_HTTP_LOCK = threading.Lock()
+
+def _http_session():
+    global _HTTP_SESSION
+    with _HTTP_LOCK:
+        if _HTTP_SESSION is None:
+            import requests  # type: ignore
+            from requests.adapters import HTTPAdapter  # type: ignore
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            sess.mount("http://", adapter)
+            sess.mount("https://", adapter)
+            sess.headers["User-Agent"] = f"{PACK_NAME} ({AUTHOR})"
+            _HTTP_SESSION = sess
+        return _HTTP_SESSION
+
+class _HttpCache:
+    """ETag / Last-Modified revalidating body cache on disk, LRU-evicted by total size."""
+
+    def __init__(self, root: str = HTTP_CACHE_DIR, max_bytes: int = HTTP_CACHE_MAX):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self._store = bec_state.store(self.index_path, compact=True)
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, dict]] = None
+
+    def _load(self) -> Dict[str, dict]:
+        if self._index is None:
+            data = self._store.load()
+            self._index = data if isinstance(data, dict) else {}
+        return self._index
+
+    def _snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {u: dict(e) for u, e in self._index.items()}
+
+    def _save(self) -> None:
+        self._store.touch(self._snapshot)
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".body")
+
+    def validators(self, url: str) -> Dict[str, str]:
+        with self._lock:
+            ent = self._load().get(url)
+        if not ent:
+            return {}
+        h = {}
+        if ent.get("etag"):
+            h["If-None-Match"] = ent["etag"]
+        if ent.get("last_modified"):
+            h["If-Modified-Since"] = ent["last_modified"]
+        return h
+
+    def get(self, url: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            ent = self._load().get(url)
+            if not ent:
+                return None
+            try:
+                with open(self._body_path(url), "rb") as f:
+                    body = f.read()
+            except OSError:
+                self._index.pop(url, None)
+                gone = True
+            else:
+                ent["atime"] = time.time()
+                gone = False
+        if gone:
+            self._save()
+            return None
+        self._store.touch(self._snapshot, lazy=True)
+        return body, ent.get("encoding") or "utf-8"
+
+    def put(self, url: str, body: bytes, etag: str, last_modified: str, encoding: str) -> None:
+        if not (etag or last_modified) or len(body) > HTTP_ITEM_MAX:
+            return
+        with self._lock:
+            idx = self._load()
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._body_path(url), "wb") as f:
+                f.write(body)
+            idx[url] = {"etag": etag, "last_modified": last_modified, "encoding": encoding,
+                        "size": len(body), "atime": time.time()}
+            total = sum(e.get("size", 0) for e in idx.values())
+            for old in sorted(idx, key=lambda u: idx[u].get("atime", 0)):
+                if total <= self.max_bytes:
+                    break
+                if old == url:
+                    continue
+                total -= idx[old].get("size", 0)
+                del idx[old]
+                try:
+                    os.remove(self._body_path(old))
+                except OSError:
+                    pass
+        self._save()
+
+    def stats(self) -> Tuple[int, int]:
+        with self._lock:
+            idx = self._load()
+            return len(idx), sum(e.get("size", 0) for e in idx.values())
+
+_HTTP_CACHE = _HttpCache()
+
+def _http_get(url: str, use_cache: bool = True) -> Tuple[str, str]:
+    # (text, source) where source is "network" or "cache (304)"
+    sess = _http_session()
+    headers = _HTTP_CACHE.validators(url) if use_cache else {}
+    r = sess.get(url, timeout=HTTP_TIMEOUT, headers=headers, stream=True)
+    if r.status_code == 304 and use_cache:
+        hit = _HTTP_CACHE.get(url)
+        if hit is not None:
+            r.close()
+            return hit[0].decode(hit[1], errors="replace"), "cache (304)"
+        r.close()
+        r = sess.get(url, timeout=HTTP_TIMEOUT, stream=True)
+    with r:
+        body = b""
+        for chunk in r.iter_content(64 * 1024):
+            body += chunk
+            if len(body) > HTTP_ITEM_MAX:
+                break
+        enc = r.encoding or "utf-8"
+        truncated = len(body) > HTTP_ITEM_MAX
+        if use_cache and r.status_code == 200 and not truncated:
+            _HTTP_CACHE.put(url, body, r.headers.get("ETag", ""), r.headers.get("Last-Modified", ""), enc)
+        text = body.decode(enc, errors="replace")
+        if r.status_code >= 400:
+            text = f"HTTP {r.status_code} {r.reason}\n{text}"
+        return text, "network"
+
+def _http_headers(url: str) -> str:
+    sess = _http_session()
+    r = sess.head(url, timeout=HTTP_TIMEOUT, allow_redirects=True)
+    if r.status_code in (405, 501):
+        with sess.get(url, timeout=HTTP_TIMEOUT, stream=True) as r:
+            pass
+    lines = [f"HTTP {r.status_code} {r.reason}"]
+    lines += [f"{k}: {v}" for k, v in r.headers.items()]
+    return "\n".join(lines)
+
+def _percentile(sorted_vals: List[float], pct: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * pct / 100.0
+    lo = int(math.floor(k))
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+def _latency_report(ms: List[float]) -> str:
+    v = sorted(ms)
+    return (
+        f"n={len(v)}  min {v[0]:.1f}  p50 {_percentile(v, 50):.1f}  p90 {_percentile(v, 90):.1f}  "
+        f"p99 {_percentile(v, 99):.1f}  max {v[-1]:.1f}  (ms)"
+    )
+
+# ---------------- DNS resolver (net-dns) ----------------
+DNS_TTL = 300.0
+DNS_NEG_TTL = 30.0
+DNS_MAX_HOSTS = 5000
+DNS_CACHE_MAX = 4096
+
+_DNS_CACHE: Dict[str, Tuple[float, List[str], str]] = {}
+_DNS_STATS = {"hits": 0, "misses": 0}
+_DNS_LOCK = threading.Lock()
+
+def _resolve_one(host: str) -> Tuple[List[str], str, bool]:
+    now = time.time()
+    with _DNS_LOCK:
+        ent = _DNS_CACHE.get(host)
+        if ent is not None and ent[0] > now:
+            _DNS_STATS["hits"] += 1
+            return ent[1], ent[2], True
+        _DNS_STATS["misses"] += 1
+    try:
+        infos = socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM)
+        v4 = [i[4][0] for i in infos if i[0] == socket.AF_INET]
+        v6 = [i[4][0] for i in infos if i[0] == socket.AF_INET6]
+        addrs = list(dict.fromkeys(v4 + v6))
+        err, ttl = "", DNS_TTL
+    except (OSError, UnicodeError, ValueError) as e:
+        addrs, err, ttl = [], str(e) or type(e).__name__, DNS_NEG_TTL
+    with _DNS_LOCK:
+        now = time.time()
+        _DNS_CACHE.pop(host, None)
+        _DNS_CACHE[host] = (now + ttl, addrs, err)
+        if len(_DNS_CACHE) > DNS_CACHE_MAX:
+            for k in [k for k, v in _DNS_CACHE.items() if v[0] <= now]:
+                del _DNS_CACHE[k]
+            while len(_DNS_CACHE) > DNS_CACHE_MAX:
+                del _DNS_CACHE[next(iter(_DNS_CACHE))]
+    return addrs, err, False
+
+def _resolve_many(hosts: List[str], workers: int = 0) -> List[Tuple[str, List[str], str, bool]]:
+    from concurrent.futures import ThreadPoolExecutor
+    uniq = list(dict.fromkeys(hosts))
+    if len(uniq) == 1:
+        return [(uniq[0], *_resolve_one(uniq[0]))]
+    with ThreadPoolExecutor(max_workers=workers or min(64, len(uniq)), thread_name_prefix="dns") as pool:
+        return [(h, *r) for h, r in zip(uniq, pool.map(_resolve_one, uniq))]
+
+def _dns_stats_line() -> str:
+    with _DNS_LOCK:
+        h, m = _DNS_STATS["hits"], _DNS_STATS["misses"]
+        n = len(_DNS_CACHE)
+    total = h + m
+    rate = (100.0 * h / total) if total else 0.0
+    return f"cache: {h} hits / {total} lookups ({rate:.0f}%), {n} entries"
+
+# ---------------- background jobs (jobs / job-wait / job-kill) ----------------
+JOB_WORKERS = 4
+JOB_KEEP = 50
+JOB_WAIT_DEFAULT = 60
+
+class _Job:
+    def __init__(self, jid: int, title: str):
+        self.id = jid
+        self.title = title
+        self.status = "queued"
+        self.started = time.time()
+        self.ended = 0.0
+        self.output = _OutputCapture()
+        self.result = ""
+        self.future = None
+        self.cancel = threading.Event()
+        self.procs: List[subprocess.Popen] = []
+
+    def elapsed(self) -> float:
+        return (self.ended or time.time()) - self.started
+
+    def kill(self) -> None:
+        self.cancel.set()
+        for p in list(self.procs):
+            try:
+                p.kill()
+            except Exception:
+                pass
+        if self.future is not None:
+            self.future.cancel()
+
+class _JobCtx:
+    """ctx stand-in handed to a handler on a worker: output goes to the job (and the terminal)."""
+
+    def __init__(self, job: _Job, ctx):
+        self._job = job
+        self._ctx = ctx
+
+    def __getattr__(self, name):
+        return getattr(self._ctx, name)
+
+    def print(self, text: str) -> None:
+        self._job.output.feed(f"{text}\n")
+        _job_post(self._ctx, f"[job {self._job.id}] {text}")
+
+_JOBS: Dict[int, _Job] = {}
+_JOB_POOL = None
+_JOB_SEQ = [0]
+_JOB_LOCK = threading.Lock()
+_JOB_LOCAL = threading.local()
+_JOB_BRIDGE = None
+
+def _make_job_bridge():
+    qtc = sys.modules.get("PySide6.QtCore")
+    if qtc is None:
+        return None
+
+    class _JobBridge(qtc.QObject):
+        posted = qtc.Signal(object, str)
+
+        def __init__(self):
+            super().__init__()
+            self.posted.connect(self._deliver, qtc.Qt.ConnectionType.QueuedConnection)
+
+        @qtc.Slot(object, str)
+        def _deliver(self, ctx, text):
+            _emit(ctx, text)
+
+    return _JobBridge()
+
+def _job_post(ctx, text: str) -> None:
+    if _JOB_BRIDGE is not None:
+        try:
+            _JOB_BRIDGE.posted.emit(ctx, text)
+        except Exception:
+            pass
+
+def _current_job() -> Optional[_Job]:
+    return getattr(_JOB_LOCAL, "job", None)
+
+def _job_cancelled() -> bool:
+    job = _current_job()
+    return job is not None and job.cancel.is_set()
+
+def _job_track(proc: subprocess.Popen) -> None:
+    job = _current_job()
+    if job is not None:
+        job.procs.append(proc)
+        if job.cancel.is_set():
+            proc.kill()
+
+def _job_start(ctx, title: str, fn: Callable, argv: List[str]) -> _Job:
+    global _JOB_POOL
+    from concurrent.futures import ThreadPoolExecutor
+    with _JOB_LOCK:
+        if _JOB_POOL is None:
+            _JOB_POOL = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="ai1job")
+        _JOB_SEQ[0] += 1
+        job = _Job(_JOB_SEQ[0], title)
+        _JOBS[job.id] = job
+        finished = [j for j in _JOBS.values() if j.ended]
+        for old in finished[: max(0, len(finished) - JOB_KEEP)]:
+            del _JOBS[old.id]
+    jctx = _JobCtx(job, ctx)
+
+    def run():
+        if job.cancel.is_set():
+            return
+        job.status = "running"
+        _JOB_LOCAL.job = job
+        try:
+            res = fn(jctx, argv)
+            job.result = "" if res is None else str(res)
+            job.status = "killed" if job.cancel.is_set() else "done"
+        except Exception as e:
+            job.result = f"Error: {e}"
+            job.status = "killed" if job.cancel.is_set() else "failed"
+        finally:
+            _JOB_LOCAL.job = None
+            job.ended = time.time()
+            job.procs.clear()
+        _job_post(ctx, f"[job {job.id} {job.status}, {job.elapsed():.1f}s] {title}\n{job.result}".rstrip())
+
+    job.future = _JOB_POOL.submit(run)
+    return job
+
+def _job_handler(title: str, fn: Callable, when: Callable[[List[str]], bool] = None) -> Callable:
+    fn = _perf_wrap(title, fn)
+
+    def handler(ctx, argv):
+        if "--wait" in argv:
+            return fn(ctx, [a for a in argv if a != "--wait"])
+        if (when is not None and not when(argv)) or isinstance(ctx, _JobCtx) or _current_job() is not None:
+            return fn(ctx, argv)
+        job = _job_start(ctx, " ".join([title, *argv]), fn, list(argv))
+        tail = "" if _JOB_BRIDGE is not None else f" — job-wait {job.id} for the result"
+        return f"Job {job.id} started: {job.title}{tail}"
+    handler.is_job = True
+    return handler
+
+def _job_row(j: _Job) -> str:
+    return f"{j.id:>4}  {j.status:<8} {j.elapsed():>7.1f}s  {j.title}"
+
+# ---------------- bounded output capture ----------------
+CAPTURE_HEAD = 4000
+CAPTURE_TAIL = 4000
+SPOOL_DIR = os.path.join(DATA_DIR, "spool")
+SPOOL_MAX = 5 * 1024 * 1024
+SPOOL_BACKUPS = 3
+
+class _RotatingWriter:
+    """Append-only text log: <path>, <path>.1 … <path>.N, rotated by size."""
+
+    def __init__(self, path: str, max_bytes: int = SPOOL_MAX, backups: int = SPOOL_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8", errors="replace")
+        self._size = self._f.tell()
+
+    def write(self, text: str) -> None:
+        if self._f is None:
+            return
+        self._f.write(text)
+        self._size += len(text)
+        if self._size >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self) -> None:
+        self._f.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._f = open(self.path, "w", encoding="utf-8", errors="replace")
+        self._size = 0
+
+    def flush(self) -> None:
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+class _OutputCapture:
+    """Keeps the first `head` and last `tail` chars plus totals, never the whole stream.
+
+    With a spool name the full output goes to data/spool/<name>.log, but only once it
+    outgrows head+tail, so short commands never touch the disk.
+    """
+
+    def __init__(self, head: int = CAPTURE_HEAD, tail: int = CAPTURE_TAIL, spool: str = "",
+                 on_output: Optional[Callable[[str], None]] = None):
+        self.head_max = head
+        self.tail_max = tail
+        self.spool_name = spool
+        self.spool_path = ""
+        self.on_output = on_output
+        self.total_chars = 0
+        self.total_bytes = 0
+        self._head: List[str] = []
+        self._head_len = 0
+        self._tail: List[str] = []
+        self._tail_len = 0
+        self._decided = False
+        self._spool: Optional[_RotatingWriter] = None
+        self._live: List[str] = []
+
+    def feed(self, text: str, nbytes: Optional[int] = None) -> None:
+        if not text:
+            return
+        self.total_chars += len(text)
+        self.total_bytes += len(text.encode("utf-8", errors="replace")) if nbytes is None else nbytes
+        if self.on_output is not None:
+            self._live.append(text)
+        if self._spool is not None:
+            self._spool.write(text)
+        rest = text
+        room = self.head_max - self._head_len
+        if room > 0:
+            self._head.append(rest[:room])
+            self._head_len += min(room, len(rest))
+            rest = rest[room:]
+        if rest:
+            self._tail.append(rest)
+            self._tail_len += len(rest)
+        if not self._decided and self.truncated():
+            self._decided = True
+            if self.spool_name:
+                self.spool_path = os.path.join(SPOOL_DIR, f"{self.spool_name}.log")
+                self._spool = _RotatingWriter(self.spool_path)
+                self._spool.write(f"===== {_now()} =====\n" + "".join(self._head) + "".join(self._tail))
+        while self._tail and self._tail_len - len(self._tail[0]) >= self.tail_max:
+            self._tail_len -= len(self._tail.pop(0))
+
+    def flush_live(self) -> None:
+        if self._live and self.on_output is not None:
+            chunk = "".join(self._live)
+            self._live = []
+            self.on_output(chunk)
+
+    def truncated(self) -> bool:
+        return self.total_chars > self.head_max + self.tail_max
+
+    def render(self) -> str:
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if not self.truncated():
+            return head + tail
+        tail = tail[-self.tail_max:]
+        skipped = self.total_chars - len(head) - len(tail)
+        note = f"; full output: {self.spool_path}" if self.spool_path else ""
+        return f"{head}\n…({skipped} chars skipped, {_human_bytes(self.total_bytes)} total{note})…\n{tail}"
+
+    def summary(self) -> str:
+        note = f", full output: {self.spool_path}" if self.spool_path else ""
+        return f"{_human_bytes(self.total_bytes)} of output{note}"
+
+    def close(self) -> None:
+        self.flush_live()
+        if self._spool is not None:
+            self._spool.close()
+
+def _run_capture(cmd: List[str], timeout: float = 25, cap: Optional[_OutputCapture] = None) -> str:
+    # merged stdout/stderr read incrementally; job-kill can interrupt it
+    import codecs
+    import locale
+    cap = cap or _OutputCapture()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _job_track(proc)
+    chunks: "queue.Queue[Tuple[int, Optional[bytes]]]" = queue.Queue()
+
+    def pump(idx: int, stream) -> None:
+        read = getattr(stream, "read1", stream.read)
+        while True:
+            b = read(65536)
+            if not b:
+                break
+            chunks.put((idx, b))
+        chunks.put((idx, None))
+
+    for i, stream in enumerate((proc.stdout, proc.stderr)):
+        threading.Thread(target=pump, args=(i, stream), daemon=True).start()
+    enc = locale.getpreferredencoding(False) or "utf-8"
+    decoders = [codecs.getincrementaldecoder(enc)(errors="replace") for _ in range(2)]
+    open_streams = 2
+    deadline = time.time() + timeout
+    try:
+        while open_streams:
+            left = deadline - time.time()
+            if left <= 0:
+                proc.kill()
+                raise subprocess.TimeoutExpired(cmd, timeout, output=cap.render())
+            try:
+                idx, b = chunks.get(timeout=min(left, 0.1))
+            except queue.Empty:
+                cap.flush_live()
+                continue
+            if b is None:
+                open_streams -= 1
+                cap.feed(decoders[idx].decode(b"", final=True))
+                continue
+            cap.feed(decoders[idx].decode(b), len(b))
+            if chunks.empty():
+                cap.flush_live()
+        proc.wait(timeout=max(0.1, deadline - time.time()))
+    finally:
+        cap.close()
+    return cap.render()
+
+def _live_capture(ctx, spool: str = "") -> Tuple[_OutputCapture, List[bool]]:
+    streamed = [False]
+
+    def show(text: str) -> None:
+        if _emit(ctx, text.rstrip("\n")):
+            streamed[0] = True
+    return _OutputCapture(spool=spool, on_output=show), streamed
+
+# ---------------- persistent shell pool (AI1cmd shell run) ----------------
+SHELL_POOL_SIZE = 1
+SHELL_TIMEOUT = 25
+
+def _shell_kind(profile: str) -> str:
+    return {"powershell": "ps", "pwsh": "ps", "cmd": "cmd"}.get(profile, "sh")
+
+def _shell_argv(profile: str) -> Optional[List[str]]:
+    base = _resolve_gitbash() if profile == "gitbash" else SHELLS.get(profile)
+    if not base:
+        return None
+    kind = _shell_kind(profile)
+    if kind == "ps":
+        return base[:-1] + ["-Command", "-"]  # drop the trailing "-Command"
+    if kind == "cmd":
+        return [base[0], "/Q", "/K"]
+    return [base[0], "-l"] if base[-1] == "-lc" else base[:-1]
+
+def _shell_frame(kind: str, cmdline: str, tag: str) -> str:
+    # command followed by a sentinel line "<tag> <exit code>"
+    if kind == "ps":
+        return f"{cmdline}\nWrite-Output \"`n{tag} $LASTEXITCODE\"\n"
+    if kind == "cmd":
+        return f"{cmdline}\necho.\necho {tag} %ERRORLEVEL%\n"
+    return f"{{ {cmdline}\n}} </dev/null 2>&1; printf '\\n%s %s\\n' {tag} $?\n"
+
+class _ShellWorker:
+    def __init__(self, profile: str, argv: List[str]):
+        self.profile = profile
+        self.kind = _shell_kind(profile)
+        self.argv = argv
+        self.proc: Optional[subprocess.Popen] = None
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.started = 0.0
+        self.runs = 0
+        self.restarts = -1
+        self.lock = threading.Lock()
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self) -> None:
+        self.stop()
+        self.lines = queue.Queue()
+        self.proc = subprocess.Popen(
+            self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, errors="replace", bufsize=1,
+        )
+        self.started = time.time()
+        self.restarts += 1
+        threading.Thread(target=self._pump, args=(self.proc, self.lines), name=f"shell-{self.profile}", daemon=True).start()
+        self._exchange({"ps": "$null", "cmd": "rem"}.get(self.kind, "true"), SHELL_TIMEOUT)
+
+    @staticmethod
+    def _pump(proc: subprocess.Popen, lines: "queue.Queue[Optional[str]]") -> None:
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def stop(self) -> None:
+        if self.proc is not None:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=2)
+            except Exception:
+                pass
+        self.proc = None
+
+    def ensure(self) -> None:
+        if not self.alive():
+            self.start()
+
+    def run(self, cmdline: str, timeout: float = SHELL_TIMEOUT, cap: Optional[_OutputCapture] = None) -> Tuple[str, Optional[int]]:
+        # (output, exit code); exit code None means the shell died or timed out and was reset
+        self.ensure()
+        self.runs += 1
+        return self._exchange(cmdline, timeout, cap)
+
+    def _exchange(self, cmdline: str, timeout: float, cap: Optional[_OutputCapture] = None) -> Tuple[str, Optional[int]]:
+        if self.proc is None:
+            return "(shell not running)", None
+        cap = cap or _OutputCapture()
+        tag = f"__AI1_END_{os.urandom(6).hex()}__"
+        _job_track(self.proc)
+        try:
+            self.proc.stdin.write(_shell_frame(self.kind, cmdline, tag))
+            self.proc.stdin.flush()
+        except (OSError, ValueError):
+            self.stop()
+            return "(shell died; restarted on next run)", None
+        held: Optional[str] = None
+        deadline = time.time() + timeout
+        try:
+            while True:
+                left = deadline - time.time()
+                try:
+                    line = self.lines.get(timeout=max(0.0, left)) if left > 0 else self.lines.get_nowait()
+                except queue.Empty:
+                    self.stop()
+                    cap.feed(held or "")
+                    return cap.render() + f"\nTimeout ({timeout:.0f}s); shell restarted.", None
+                if line is None:
+                    self.stop()
+                    cap.feed(held or "")
+                    return cap.render(), None
+                if line.startswith(tag):
+                    code = line[len(tag):].strip()
+                    if held not in (None, "\n", "\r\n"):
+                        cap.feed(held)
+                    return cap.render(), int(code) if code.lstrip("-").isdigit() else 0
+                if held is not None:
+                    cap.feed(held)
+                held = line
+                if self.lines.empty():
+                    cap.flush_live()
+        finally:
+            cap.close()
+
+class _ShellPool:
+    def __init__(self, profile: str, size: int = SHELL_POOL_SIZE):
+        self.profile = profile
+        self.size = max(1, size)
+        self.workers: List[_ShellWorker] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> _ShellWorker:
+        while True:
+            with self._lock:
+                for w in self.workers:
+                    if w.lock.acquire(blocking=False):
+                        return w
+                if len(self.workers) < self.size:
+                    argv = _shell_argv(self.profile)
+                    if argv is None:
+                        raise RuntimeError(f"{self.profile} not found")
+                    w = _ShellWorker(self.profile, argv)
+                    w.lock.acquire()
+                    self.workers.append(w)
+                    return w
+            time.sleep(0.02)
+
+    def run(self, cmdline: str, timeout: float = SHELL_TIMEOUT, cap: Optional[_OutputCapture] = None) -> Tuple[str, Optional[int]]:
+        w = self._acquire()
+        try:
+            return w.run(cmdline, timeout, cap)
+        finally:
+            w.lock.release()
+
+    def warm(self) -> None:
+        w = self._acquire()
+        try:
+            w.ensure()
+        finally:
+            w.lock.release()
+
+    def restart(self) -> None:
+        with self._lock:
+            for w in self.workers:
+                w.stop()
+            self.workers = []
+
+    def status(self) -> List[str]:
+        rows = []
+        for i, w in enumerate(self.workers):
+            state = "up" if w.alive() else "down"
+            pid = w.proc.pid if w.proc is not None else "-"
+            up = f"{time.time() - w.started:.0f}s" if w.alive() else "-"
+            rows.append(f"{self.profile}[{i}] {state:<4} pid {pid}  uptime {up}  runs {w.runs}  restarts {max(0, w.restarts)}")
+        return rows
+
+_SHELL_POOLS: Dict[str, _ShellPool] = {}
+_SHELL_LOCK = threading.Lock()
+
+def _shell_pool(profile: str) -> _ShellPool:
+    with _SHELL_LOCK:
+        pool = _SHELL_POOLS.get(profile)
+        if pool is None:
+            pool = _SHELL_POOLS[profile] = _ShellPool(profile)
+        return pool
+
+def _warm_shells() -> None:
+    profile = "powershell" if os.name == "nt" else "bash"
+    if _shell_argv(profile) and _which(SHELLS[profile][0]):
+        threading.Thread(target=lambda: _shell_pool(profile).warm(), name="shell-warm", daemon=True).start()
+
+# ---------------- command name index (pack-list / pack counts / did-you-mean) ----------------
+PACK_LIST_PAGE = 200
+PACK_LIST_DEFAULT = ("file", "net", "sys", "text", "more", "meme")
+PACK_LIST_HUBS = ("AI1cmd", "IDSPcommands", "pack-list")
+
+def _cmd_category(name: str) -> str:
+    return name.split("-", 1)[0].lower()
+
+class _CmdIndex:
+    """Sorted (case-insensitive) command names with per-category counts; fed by _reg and the host list."""
+
+    def __init__(self):
+        self.keys: List[str] = []   # lowercase, sorted
+        self.names: List[str] = []
+        self.counts: Dict[str, int] = {}
+        self._pending: Dict[str, str] = {}
+        self._dropped: set = set()
+        self._seen: set = set()
+        self._own: set = set()
+        self._host: frozenset = frozenset()
+        self._grams: Dict[str, List[int]] = {}
+        self._gram_n: List[int] = []
+
+    def add(self, name: str, own: bool = True) -> None:
+        if own:
+            self._own.add(name)
+        if name in self._seen:
+            return
+        self._seen.add(name)
+        self._pending[name.lower()] = name
+        self._dropped.discard(name.lower())
+        cat = _cmd_category(name)
+        self.counts[cat] = self.counts.get(cat, 0) + 1
+
+    def remove(self, name: str) -> None:
+        if name not in self._seen:
+            return
+        self._seen.discard(name)
+        self._pending.pop(name.lower(), None)
+        self._dropped.add(name.lower())
+        cat = _cmd_category(name)
+        left = self.counts.get(cat, 0) - 1
+        if left > 0:
+            self.counts[cat] = left
+        else:
+            self.counts.pop(cat, None)
+
+    def sync(self, all_names) -> None:
+        host = frozenset(all_names)
+        if host == self._host:
+            return
+        for n in self._host - host:
+            if n not in self._own:
+                self.remove(n)
+        for n in host - self._host:
+            self.add(n, own=False)
+        self._host = host
+
+    def _settle(self) -> None:
+        if self._pending or self._dropped:
+            merged = dict(zip(self.keys, self.names))
+            for k in self._dropped:
+                merged.pop(k, None)
+            merged.update(self._pending)
+            self._pending.clear()
+            self._dropped.clear()
+            self.keys = sorted(merged)
+            self.names = [merged[k] for k in self.keys]
+            self._grams, self._gram_n = {}, []
+            for i, k in enumerate(self.keys):
+                grams = {k[j:j + 2] for j in range(len(k) - 1)}
+                self._gram_n.append(len(grams))
+                for g in grams:
+                    self._grams.setdefault(g, []).append(i)
+
+    def prefix(self, pref: str) -> List[str]:
+        self._settle()
+        pref = pref.lower()
+        lo = bisect.bisect_left(self.keys, pref)
+        hi = bisect.bisect_left(self.keys, pref + "\uffff", lo)
+        return self.names[lo:hi]
+
+    def default_view(self) -> List[str]:
+        self._settle()
+        out: List[str] = []
+        for cat in sorted(PACK_LIST_DEFAULT):
+            out += self.prefix(cat + "-")
+        out += [n for n in PACK_LIST_HUBS if n in self._seen]
+        return sorted(out, key=str.lower)
+
+    def count(self, cat: str) -> int:
+        return self.counts.get(cat.lower(), 0)
+
+    def suggest(self, word: str, n: int = 5, cutoff: float = 0.5) -> List[str]:
+        # did-you-mean: Dice similarity of bigram sets via the inverted bigram index
+        self._settle()
+        word = word.lower()
+        grams = {word[j:j + 2] for j in range(len(word) - 1)}
+        shared: Dict[int, int] = {}
+        for g in grams:
+            for i in self._grams.get(g, ()):
+                shared[i] = shared.get(i, 0) + 1
+        scored = [(2.0 * c / (len(grams) + self._gram_n[i]), i) for i, c in shared.items()]
+        scored = sorted((x for x in scored if x[0] >= cutoff), key=lambda x: (-x[0], self.keys[x[1]]))
+        return [self.names[i] for _, i in scored[:n]]
+
+_CMD_INDEX = _CmdIndex()
+
+# ---------------- perf instrumentation (perf-stats / perf-profile) ----------------
+PERF_BUCKETS_PER_OCTAVE = 8
+
+_PERF_ON = os.environ.get("AI1CMD_PERF", "") not in ("", "0")
+_PERF: Dict[str, "_PerfStat"] = {}
+_HANDLERS_BY_NAME: Dict[str, Callable] = {}
+
+def _perf_bucket(us: float) -> int:
+    return int(math.log2(us + 1.0) * PERF_BUCKETS_PER_OCTAVE)
+
+def _perf_value(b: int) -> float:
+    return 2.0 ** ((b + 1) / PERF_BUCKETS_PER_OCTAVE) - 1.0
+
+class _PerfStat:
+    __slots__ = ("calls", "errors", "wall", "cpu", "out_bytes", "wall_total", "cpu_total", "wall_max", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.wall: Dict[int, int] = {}
+        self.cpu: Dict[int, int] = {}
+        self.out_bytes = 0
+        self.wall_total = 0.0
+        self.cpu_total = 0.0
+        self.wall_max = 0.0
+
+    def add(self, wall_us: float, cpu_us: float, out_len: int, failed: bool) -> None:
+        bw, bc = _perf_bucket(wall_us), _perf_bucket(cpu_us)
+        with self._lock:
+            self.calls += 1
+            self.errors += failed
+            self.wall[bw] = self.wall.get(bw, 0) + 1
+            self.cpu[bc] = self.cpu.get(bc, 0) + 1
+            self.out_bytes += out_len
+            self.wall_total += wall_us
+            self.cpu_total += cpu_us
+            self.wall_max = max(self.wall_max, wall_us)
+
+    def snapshot(self) -> "_PerfStat":
+        st = _PerfStat()
+        with self._lock:
+            st.calls, st.errors = self.calls, self.errors
+            st.wall, st.cpu = dict(self.wall), dict(self.cpu)
+            st.out_bytes, st.wall_total, st.cpu_total, st.wall_max = (
+                self.out_bytes, self.wall_total, self.cpu_total, self.wall_max)
+        return st
+
+    @staticmethod
+    def pct(hist: Dict[int, int], q: float) -> float:
+        total = sum(hist.values())
+        need = max(1, math.ceil(total * q))
+        seen = 0
+        for b in sorted(hist):
+            seen += hist[b]
+            if seen >= need:
+                return _perf_value(b)
+        return 0.0
+
+def _perf_wrap(name: str, fn: Callable) -> Callable:
+    def handler(ctx, argv):
+        if not _PERF_ON:
+            return fn(ctx, argv)
+        t0, c0 = time.perf_counter(), time.thread_time()
+        failed = True
+        out = None
+        try:
+            out = fn(ctx, argv)
+            failed = False
+            return out
+        finally:
+            wall = (time.perf_counter() - t0) * 1e6
+            cpu = (time.thread_time() - c0) * 1e6
+            table = _ctx_registry(ctx)[2]
+            st = table.get(name)
+            if st is None:
+                st = table.setdefault(name, _PerfStat())
+            st.add(wall, cpu, len(out) if isinstance(out, str) else 0, failed)
+    return handler
+
+def _perf_table(table: Dict[str, "_PerfStat"], pref: str, limit: int = 40) -> str:
+    rows = sorted(((n, st.snapshot()) for n, st in list(table.items()) if n.lower().startswith(pref)),
+                  key=lambda r: r[1].wall_total, reverse=True)
+    if not rows:
+        return "(no samples yet)" if _PERF_ON else "(perf is off — enable with: perf-stats on)"
+    ms = lambda us: f"{us / 1000:9.2f}"  # noqa: E731
+    out = [f"{'COMMAND':<28}{'CALLS':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'cpu p50':>10}{'avg out':>10}"]
+    for n, st in rows[:limit]:
+        wall = lambda q: min(_PerfStat.pct(st.wall, q), st.wall_max)  # noqa: E731
+        out.append(
+            f"{n[:27]:<28}{st.calls:>7}{ms(wall(.50))}{ms(wall(.95))}"
+            f"{ms(wall(.99))}{ms(st.wall_max)}{ms(_PerfStat.pct(st.cpu, .50))}"
+            f"{_human_bytes(st.out_bytes / st.calls):>10}" + (f"  ({st.errors} err)" if st.errors else "")
+        )
+    if len(rows) > limit:
+        out.append(f"…{len(rows) - limit} more (narrow with a prefix)")
+    return "\n".join(out)
+
+def _perf(host):
+    def perf_stats(ctx, argv):
+        global _PERF_ON
+        arg = argv[0].lower() if argv else ""
+        if arg in ("on", "off"):
+            _PERF_ON = arg == "on"
+            return f"perf {'on' if _PERF_ON else 'off'}"
+        table = _ctx_registry(ctx)[2]
+        if arg == "reset":
+            table.clear()
+            return "perf samples cleared"
+        return _perf_table(table, arg)
+
+    def perf_profile(ctx, argv):
+        if not argv: return "Usage: perf-profile <command> [args...]"
+        name = argv[0]
+        index, handlers, _ = _ctx_registry(ctx)
+        fn = handlers.get(name)
+        if fn is None:
+            near = index.suggest(name)
+            return "Unknown command." + (f" Did you mean: {', '.join(near)}" if near else "")
+        args = argv[1:]
+        if getattr(fn, "is_job", False) and "--wait" not in args:
+            args.append("--wait")
+        import cProfile
+        import io
+        import pstats
+        prof = cProfile.Profile()
+        t0 = time.perf_counter()
+        try:
+            out = prof.runcall(fn, ctx, args)
+        except Exception as e:
+            out = f"(raised {type(e).__name__}: {e})"
+        dt = time.perf_counter() - t0
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(25)
+        report = "\n".join(l for l in buf.getvalue().splitlines() if l.strip())
+        head = f"{name}: {dt * 1000:.2f} ms, output {len(out) if isinstance(out, str) else 0} chars"
+        return f"{head}\n{report}"
+
+    _reg(host, "perf-stats", "Per-command latency histograms (p50/p95/p99)", "perf-stats [prefix] | on | off | reset", perf_stats, "plugin")
+    _reg(host, "perf-profile", "Run one command under cProfile, show top functions", "perf-profile <command> [args...]", perf_profile, "plugin")
+
 # ---------------- command registry helpers ----------------
+def _registry(host) -> Tuple[_CmdIndex, Dict[str, Callable], Dict[str, _PerfStat]]:
+    index = getattr(host, "cmd_index", None)
+    if index is None:
+        return _CMD_INDEX, _HANDLERS_BY_NAME, _PERF
+    return index, host.handlers, host.perf_stats
+
+def _ctx_registry(ctx) -> Tuple[_CmdIndex, Dict[str, Callable], Dict[str, _PerfStat]]:
+    return _registry(getattr(getattr(ctx, "app", None), "cmds", None))
+
 def _reg(host, name: str, help_: str, usage: str, handler: Callable, category: str, aliases: List[str] = None):
+    index, handlers, _ = _registry(host)
+    index.add(name)
+    handlers[name] = handler
     host.register_command(
         name=name,
         help=help_,
         usage=usage,
-        handler=handler,
+        handler=handler if getattr(handler, "is_job", False) else _perf_wrap(name, handler),
         aliases=aliases or [],
         category=category
     )
 
 # ---------------- REAL packs: file / net / system / text / dev / more ----------------
-@dataclass
-class Op:
+class Op(NamedTuple):
     name: str
     help: str
     usage: str
-    fn: Callable
+    job: object = False
+    args: Tuple[str, ...] = ()
+
+# static command table; each group's handlers are built on first use by _<group>_ops()
+_OP_TABLE: Dict[str, List[Op]] = {
+    "file": [
+        Op("file-pwd", "Show current directory", "file-pwd"),
+        Op("file-ls", "List directory (paged, sortable)", "file-ls [path] [--page N] [--sort name|size|mtime]"),
+        Op("file-tree", "Directory tree", "file-tree [path] [depth] [--max N] [--stream]", args=("[path=.]", "[depth=2]")),
+        Op("file-cat", "Read file (trimmed)", "file-cat <file>"),
+        Op("file-head", "First lines", "file-head <file> [lines]", args=("<file>", "[lines=20]")),
+        Op("file-tail", "Last lines (reads backward from EOF)", "file-tail <file> [lines]", args=("<file>", "[lines=20]")),
+        Op("file-follow", "Follow appended lines (handles rotation/truncation)", "file-follow <file> [--for SECONDS] [--reset]", job=True),
+        Op("file-write", "Write file (overwrite)", "file-write <file> <text...>"),
+        Op("file-append", "Append line", "file-append <file> <text...>"),
+        Op("file-mkdir", "Create folder", "file-mkdir <dir>"),
+        Op("file-exists", "Check exists", "file-exists <path>"),
+        Op("file-info", "File/dir info", "file-info <path>"),
+        Op("file-size", "Size (file or folder, cached per folder mtime)", "file-size <path> [--fresh]"),
+        Op("file-du", "Largest subfolders (top N)", "file-du <dir> [top_n] [--fresh]", job=True),
+        Op("file-sha256", "SHA256 of file, or manifest of a folder", "file-sha256 <file> | <dir> --recursive [--out FILE]",
+           job=lambda argv: "--recursive" in argv),
+        Op("file-findname", "Find by filename (substring, prefix or glob; indexed if built)", "file-findname <root> <pattern> [--prefix]"),
+        Op("file-index", "Persistent filename index for file-findname", "file-index build|status|drop <root>",
+           job=lambda argv: bool(argv) and argv[0].lower() == "build"),
+        Op("file-findtext", "Find text in files by extension (parallel)", "file-findtext <root> <text> <ext|*> [--lines] [--stream]", job=True),
+        Op("file-copy", "Copy file", "file-copy <src> <dst>"),
+        Op("file-move", "Move/rename", "file-move <src> <dst>"),
+        Op("file-rm", "Delete file (safe)", "file-rm <file>"),
+    ],
+    "net": [
+        Op("net-ip", "Show IP info", "net-ip"),
+        Op("net-dns", "DNS lookup (A/AAAA, batch, cached)", "net-dns <host...> [--file hosts.txt] | --stats | --flush"),
+        Op("net-tcpcheck", "Check TCP port", "net-tcpcheck <host> <port>", args=("<host>", "<port>")),
+        Op("net-scan", "Concurrent TCP port sweep (host or CIDR)", "net-scan <host|cidr> [ports|common] [--concurrency N] [--timeout S]", job=True),
+        Op("net-whois-hint", "WHOIS hint", "net-whois-hint [domain]"),
+        Op("net-httpget", "HTTP GET, cached + keep-alive (needs requests)", "net-httpget <url> [--nocache] [--bench N]"),
+        Op("net-headers", "HTTP headers (needs requests)", "net-headers <url>"),
+        Op("net-serve-hint", "How to start local server", "net-serve-hint [port]"),
+    ],
+    "sys": [
+        Op("sys-stats", "CPU/RAM quick stats", "sys-stats"),
+        Op("sys-uptime", "Uptime", "sys-uptime"),
+        Op("sys-procs", "Top processes by RAM", "sys-procs"),
+        Op("sys-env", "Env vars (or one)", "sys-env [KEY]"),
+        Op("sys-osinfo", "OS + Python info", "sys-osinfo"),
+    ],
+    "text": [
+        Op("text-upper", "Uppercase", "text-upper <text...>"),
+        Op("text-lower", "Lowercase", "text-lower <text...>"),
+        Op("text-title", "Title Case", "text-title <text...>"),
+        Op("text-strip", "Strip spaces", "text-strip <text...>"),
+        Op("text-reverse", "Reverse text", "text-reverse <text...>"),
+        Op("text-len", "Length in chars", "text-len <text...>"),
+        Op("text-words", "Word count", "text-words <text...>"),
+        Op("text-b64e", "Base64 encode", "text-b64e <text...>"),
+        Op("text-b64d", "Base64 decode", "text-b64d <base64...>"),
+        Op("text-regexfind", "Regex findall", "text-regexfind <pattern> <text...>"),
+    ],
+    "more": [
+        Op("more-calc", "Calculator (math only)", "more-calc <expr>"),
+        Op("more-jsonfmt", "Format JSON text", "more-jsonfmt <json...>"),
+        Op("more-rand", "Random int", "more-rand [max]"),
+        Op("more-now", "Current time", "more-now"),
+        Op("more-sha256text", "SHA256 of text", "more-sha256text <text...>"),
+    ],
+}
 
 # FILE ops (real)
-def _file_ops() -> List[Op]:
+def _file_ops() -> Dict[str, Callable]:
     def pwd(ctx, argv): return _cwd()
 
     def ls(ctx, argv):
-        path = argv[0] if argv else "."
-        items = sorted(os.listdir(path))
+        args, flags = _split_flags(argv, ("page", "sort", "per"))
+        path = args[0] if args else "."
+        sort = str(flags.get("sort", "name")).lower()
+        if sort not in ("name", "size", "mtime"):
+            return "Usage: file-ls [path] [--page N] [--sort name|size|mtime] [--per N]"
+        rows = _ls_rows(path, sort)
+        per = max(1, _int_flag(flags, "per", LS_PAGE))
+        pages = max(1, (len(rows) + per - 1) // per)
+        page = min(max(1, _int_flag(flags, "page", 1)), pages)
         out = []
-        for it in items[:400]:
-            fp = os.path.join(path, it)
-            tag = "<DIR>" if os.path.isdir(fp) else "     "
-            out.append(f"{tag} {it}")
-        if len(items) > 400:
-            out.append("…(trimmed)…")
+        for name, is_dir, size, mt in rows[(page - 1) * per: page * per]:
+            tag = "<DIR>" if is_dir else "     "
+            if sort == "size":
+                out.append(f"{tag} {_human_bytes(size):>10}  {name}")
+            elif sort == "mtime":
+                out.append(f"{tag} {time.strftime('%Y-%m-%d %H:%M', time.localtime(mt))}  {name}")
+            else:
+                out.append(f"{tag} {name}")
+        if pages > 1:
+            out.append(f"…page {page}/{pages} ({len(rows)} entries)" + (f" — next: --page {page + 1}" if page < pages else ""))
         return "\n".join(out)
 
     def tree(ctx, argv):
-        root = argv[0] if argv else "."
-        depth = int(argv[1]) if len(argv) > 1 and argv[1].isdigit() else 2
-        lines = []
-        root = os.path.abspath(root)
-
-        def walk(p: str, d: int, prefix: str):
-            if d < 0: return
-            try:
-                items = sorted(os.listdir(p))
-            except Exception:
-                return
-            for i, it in enumerate(items[:200]):
-                fp = os.path.join(p, it)
-                last = (i == min(len(items), 200) - 1)
-                connector = "└─ " if last else "├─ "
-                lines.append(prefix + connector + it + ("/" if os.path.isdir(fp) else ""))
-                if os.path.isdir(fp) and d > 0:
-                    walk(fp, d - 1, prefix + ("   " if last else "│  "))
-            if len(items) > 200:
-                lines.append(prefix + "…(trimmed)…")
-        lines.append(root)
-        walk(root, depth, "")
+        args, flags = _split_flags(argv, ("max",))
+        root = os.path.abspath(args[0] if args else ".")
+        depth = int(args[1]) if len(args) > 1 and args[1].isdigit() else 2
+        lines = _iter_tree(root, depth, _int_flag(flags, "max", TREE_MAX_PER_DIR))
+        if flags.get("stream") and _emit(ctx, next(lines)):
+            n = 1
+            batch: List[str] = []
+            for line in lines:
+                batch.append(line)
+                if len(batch) >= 200:
+                    _emit(ctx, "\n".join(batch))
+                    n += len(batch)
+                    batch = []
+            if batch:
+                _emit(ctx, "\n".join(batch))
+                n += len(batch)
+            return f"({n} lines)"
         return "\n".join(lines)
 
     def cat(ctx, argv):
@@ -219,9 +2112,41 @@ def _file_ops() -> List[Op]:
     def tail(ctx, argv):
         if not argv: return "Usage: file-tail <file> [lines]"
         lines = int(argv[1]) if len(argv) > 1 and argv[1].isdigit() else 20
-        with open(argv[0], "r", encoding="utf-8", errors="replace") as f:
-            data = f.readlines()
-        return "".join(data[-lines:]) or "(empty)"
+        return _tail_lines(argv[0], lines) or "(empty)"
+
+    def follow(ctx, argv):
+        args, flags = _split_flags(argv, ("for",))
+        if not args: return "Usage: file-follow <file> [--for SECONDS] [--reset]"
+        path = args[0]
+        if not os.path.isfile(path):
+            return "File not found."
+        key = os.path.abspath(path)
+        if flags.get("reset"):
+            _FOLLOW.pop(key, None)
+        if key not in _FOLLOW:
+            _follow_poll(key)
+            head = _tail_lines(key, 10)
+            if not _emit(ctx, head.rstrip("\n") or "(empty)"):
+                return (head.rstrip("\n") or "(empty)") + "\n(following; run file-follow again for new lines)"
+        secs = _int_flag(flags, "for", 10)
+        out: List[str] = []
+        live = False
+        deadline = time.time() + secs
+        while True:
+            text, note = _follow_poll(key)
+            for chunk in (note, text.rstrip("\n")):
+                if chunk:
+                    if _emit(ctx, chunk):
+                        live = True
+                    else:
+                        out.append(chunk)
+            if out or time.time() >= deadline or _job_cancelled():
+                break
+            _pump_ui()
+            time.sleep(0.25)
+        if out:
+            return "\n".join(out)
+        return f"(follow paused after {secs}s; run again to continue)" if live else "(no new lines)"
 
     def write(ctx, argv):
         if len(argv) < 2: return "Usage: file-write <file> <text...>"
@@ -256,53 +2181,137 @@ def _file_ops() -> List[Op]:
         )
 
     def size(ctx, argv):
-        if not argv: return "Usage: file-size <path>"
-        p = argv[0]
+        args, flags = _split_flags(argv)
+        if not args: return "Usage: file-size <path> [--fresh]"
+        p = args[0]
         if os.path.isdir(p):
-            total = 0
-            for root, _, files in os.walk(p):
-                for fn in files:
-                    try:
-                        total += os.path.getsize(os.path.join(root, fn))
-                    except Exception:
-                        pass
-            return _human_bytes(total)
+            totals, _ = _dir_sizes(p, fresh=bool(flags.get("fresh")))
+            return _human_bytes(totals[os.path.abspath(p)])
         return _human_bytes(os.path.getsize(p))
 
+    def du(ctx, argv):
+        args, flags = _split_flags(argv)
+        if not args: return "Usage: file-du <dir> [top_n] [--fresh]"
+        root = os.path.abspath(args[0])
+        if not os.path.isdir(root):
+            return "Folder not found."
+        top = int(args[1]) if len(args) > 1 and args[1].isdigit() else 20
+        t0 = time.perf_counter()
+        totals, files = _dir_sizes(root, fresh=bool(flags.get("fresh")))
+        dt = time.perf_counter() - t0
+        rows = sorted(((v, k) for k, v in totals.items() if k != root), reverse=True)[:top]
+        out = [f"{_human_bytes(totals[root]):>10}  {root}  ({files} files, {len(totals)} dirs, {dt:.2f}s)"]
+        for v, k in rows:
+            out.append(f"{_human_bytes(v):>10}  {os.path.relpath(k, root)}")
+        return "\n".join(out)
+
     def hashfile(ctx, argv):
-        if not argv: return "Usage: file-sha256 <file>"
-        return _sha256_file(argv[0])
+        args, flags = _split_flags(argv, ("out", "workers"))
+        if not args: return "Usage: file-sha256 <file> | file-sha256 <dir> --recursive [--out FILE]"
+        p = args[0]
+        if not os.path.isdir(p):
+            return _sha256_file(p)
+        if not flags.get("recursive"):
+            return "That's a folder. Use: file-sha256 <dir> --recursive [--out FILE]"
+        root = os.path.abspath(p)
+        files = sorted(os.path.join(r, fn) for r, _, fns in os.walk(root) for fn in fns)
+        t0 = time.perf_counter()
+        digests, hits = _sha256_many(files, _int_flag(flags, "workers", 0))
+        dt = time.perf_counter() - t0
+        out = str(flags.get("out") or os.path.join(DATA_DIR, f"sha256_{os.path.basename(root) or 'root'}.txt"))
+        lines = [f"{digests[f]}  {os.path.relpath(f, root).replace(os.sep, '/')}" for f in files]
+        _write_text(out, "\n".join(lines) + ("\n" if lines else ""))
+        errors = sum(1 for d in digests.values() if d.startswith("ERROR"))
+        return (
+            f"Hashed {len(files)} files in {dt:.2f}s ({hits} from cache, {errors} errors)\n"
+            f"Manifest: {out}"
+        )
 
     def findname(ctx, argv):
-        if len(argv) < 2: return "Usage: file-findname <root> <pattern>"
-        root, pat = argv[0], argv[1].lower()
+        args, flags = _split_flags(argv)
+        if len(args) < 2: return "Usage: file-findname <root> <pattern> [--prefix]"
+        root, pat = args[0], args[1].lower()
+        mode = "prefix" if flags.get("prefix") else ("glob" if _is_glob(pat) else "substr")
+        idx = _get_index(root)
+        if idx is not None:
+            idx.refresh()
+            hits, more = idx.query(pat, mode, under="" if os.path.abspath(root) == idx.root else root)
+            if not hits:
+                return "(no hits)"
+            return "\n".join(hits) + ("\n…(trimmed)…" if more else "")
+        import fnmatch
         hits = []
         for r, _, files in os.walk(root):
             for fn in files:
-                if pat in fn.lower():
+                low = fn.lower()
+                if mode == "prefix":
+                    ok = low.startswith(pat)
+                elif mode == "glob":
+                    ok = fnmatch.fnmatchcase(low, pat)
+                else:
+                    ok = pat in low
+                if ok:
                     hits.append(os.path.join(r, fn))
                     if len(hits) >= 200:
                         return "\n".join(hits) + "\n…(trimmed)…"
         return "\n".join(hits) if hits else "(no hits)"
 
+    def index(ctx, argv):
+        if not argv or argv[0].lower() not in ("build", "status", "drop"):
+            return "Usage: file-index build|status|drop <root>"
+        sub = argv[0].lower()
+        root = argv[1] if len(argv) > 1 else "."
+        if sub == "build":
+            if not os.path.isdir(root):
+                return "Folder not found."
+            t0 = time.perf_counter()
+            cur = _get_index(root)
+            if cur is not None and cur.root != os.path.abspath(root):
+                return f"Already covered by index of {cur.root} (file-index status {cur.root})"
+            idx = _build_index(root)
+            d, f = idx.stats()
+            return f"OK indexed {f} files in {d} dirs ({time.perf_counter() - t0:.2f}s)\n{idx.path}"
+        idx = _get_index(root)
+        if idx is None:
+            return "Not indexed. Use: file-index build <root>"
+        if sub == "drop":
+            return "OK dropped." if idx.drop() else "Index file already gone."
+        t0 = time.perf_counter()
+        changed = idx.refresh(force=True)
+        d, f = idx.stats()
+        try:
+            disk = _human_bytes(os.path.getsize(idx.path))
+        except OSError:
+            disk = "?"
+        return (
+            f"Root: {idx.root}\n"
+            f"Dirs: {d}  Files: {f}  Index: {disk}\n"
+            f"Built: {time.ctime(idx.built)}\n"
+            f"Refresh: {changed} dir(s) changed ({(time.perf_counter() - t0) * 1000:.1f} ms)"
+        )
+
     def findtext(ctx, argv):
-        if len(argv) < 3: return "Usage: file-findtext <root> <text> <ext>"
-        root, text, ext = argv[0], argv[1], argv[2].lower()
-        hits = []
-        for r, _, files in os.walk(root):
-            for fn in files:
-                if not fn.lower().endswith(ext):
-                    continue
-                p = os.path.join(r, fn)
-                try:
-                    content = _read_text(p, limit=200000)
-                    if text in content:
-                        hits.append(p)
-                        if len(hits) >= 200:
-                            return "\n".join(hits) + "\n…(trimmed)…"
-                except Exception:
-                    pass
-        return "\n".join(hits) if hits else "(no hits)"
+        args, flags = _split_flags(argv, ("limit", "workers"))
+        if len(args) < 3 or not args[1]:
+            return "Usage: file-findtext <root> <text> <ext|*> [--lines] [--stream] [--limit N] [--workers N]"
+        root, text, ext = args[0], args[1], args[2]
+        if not os.path.isdir(root):
+            return "Folder not found."
+        stream = bool(flags.get("stream"))
+        search = _TextSearch(
+            root, text, ext,
+            lines=stream or bool(flags.get("lines")),
+            limit=_int_flag(flags, "limit", FINDTEXT_LIMIT),
+            workers=_int_flag(flags, "workers", 0),
+        )
+        if stream and _emit(ctx, f"Searching {search.root} …"):
+            hits = search.run(on_hit=lambda line: _emit(ctx, line))
+            tail = "…(trimmed)…" if search.truncated else ""
+            return f"{tail}\n{len(hits)} hit(s)".strip()
+        hits = sorted(search.run())
+        if not hits:
+            return "(no hits)"
+        return "\n".join(hits) + ("\n…(trimmed)…" if search.truncated else "")
 
     def copy(ctx, argv):
         if len(argv) < 2: return "Usage: file-copy <src> <dst>"
@@ -324,29 +2333,32 @@ def _file_ops() -> List[Op]:
         os.remove(p)
         return "OK"
 
-    return [
-        Op("file-pwd", "Show current directory", "file-pwd", pwd),
-        Op("file-ls", "List directory", "file-ls [path]", ls),
-        Op("file-tree", "Directory tree", "file-tree [path] [depth]", tree),
-        Op("file-cat", "Read file (trimmed)", "file-cat <file>", cat),
-        Op("file-head", "First lines", "file-head <file> [lines]", head),
-        Op("file-tail", "Last lines", "file-tail <file> [lines]", tail),
-        Op("file-write", "Write file (overwrite)", "file-write <file> <text...>", write),
-        Op("file-append", "Append line", "file-append <file> <text...>", append),
-        Op("file-mkdir", "Create folder", "file-mkdir <dir>", mkdir),
-        Op("file-exists", "Check exists", "file-exists <path>", exists),
-        Op("file-info", "File/dir info", "file-info <path>", info),
-        Op("file-size", "Size (file or folder)", "file-size <path>", size),
-        Op("file-sha256", "SHA256 hash of file", "file-sha256 <file>", hashfile),
-        Op("file-findname", "Find by filename substring", "file-findname <root> <pattern>", findname),
-        Op("file-findtext", "Find text in files by extension", "file-findtext <root> <text> <ext>", findtext),
-        Op("file-copy", "Copy file", "file-copy <src> <dst>", copy),
-        Op("file-move", "Move/rename", "file-move <src> <dst>", move),
-        Op("file-rm", "Delete file (safe)", "file-rm <file>", rm),
-    ]
+    return {
+        "file-pwd": pwd,
+        "file-ls": ls,
+        "file-tree": tree,
+        "file-cat": cat,
+        "file-head": head,
+        "file-tail": tail,
+        "file-follow": follow,
+        "file-write": write,
+        "file-append": append,
+        "file-mkdir": mkdir,
+        "file-exists": exists,
+        "file-info": info,
+        "file-size": size,
+        "file-du": du,
+        "file-sha256": hashfile,
+        "file-findname": findname,
+        "file-index": index,
+        "file-findtext": findtext,
+        "file-copy": copy,
+        "file-move": move,
+        "file-rm": rm,
+    }
 
 # NET ops (real)
-def _net_ops() -> List[Op]:
+def _net_ops() -> Dict[str, Callable]:
     def ip(ctx, argv):
         host = socket.gethostname()
         ip_ = "unknown"
@@ -360,8 +2372,40 @@ def _net_ops() -> List[Op]:
         return f"Host: {host}\nIP: {ip_}"
 
     def dns(ctx, argv):
-        if not argv: return "Usage: net-dns <host>"
-        return socket.gethostbyname(argv[0])
+        args, flags = _split_flags(argv, ("file", "workers"))
+        if flags.get("stats"):
+            return _dns_stats_line()
+        if flags.get("flush"):
+            with _DNS_LOCK:
+                _DNS_CACHE.clear()
+            return "OK cache flushed."
+        hosts = list(args)
+        if flags.get("file"):
+            try:
+                with open(str(flags["file"]), "r", encoding="utf-8", errors="replace") as f:
+                    hosts += [ln.split("#", 1)[0].strip() for ln in f]
+            except OSError as e:
+                return f"Cannot read host file: {e}"
+            hosts = [h for h in hosts if h]
+        if not hosts: return "Usage: net-dns <host...> [--file hosts.txt] | --stats | --flush"
+        if len(hosts) > DNS_MAX_HOSTS:
+            return f"Too many hosts ({len(hosts)}); max {DNS_MAX_HOSTS}."
+        t0 = time.perf_counter()
+        rows = _resolve_many(hosts, _int_flag(flags, "workers", 0))
+        dt = time.perf_counter() - t0
+        if len(rows) == 1 and not rows[0][2]:
+            return "\n".join(rows[0][1])
+        out = []
+        fails = 0
+        for h, addrs, err, cached in rows:
+            tag = " (cached)" if cached else ""
+            if err:
+                fails += 1
+                out.append(f"{h}: FAILED {err}{tag}")
+            else:
+                out.append(f"{h}: {', '.join(addrs)}{tag}")
+        out.append(f"\n{len(rows)} host(s) in {dt * 1000:.0f} ms, {fails} failed — {_dns_stats_line()}")
+        return "\n".join(out)
 
     def tcp(ctx, argv):
         if len(argv) < 2: return "Usage: net-tcpcheck <host> <port>"
@@ -377,6 +2421,27 @@ def _net_ops() -> List[Op]:
             try: s.close()
             except Exception: pass
 
+    def scan(ctx, argv):
+        args, flags = _split_flags(argv, ("concurrency", "timeout"))
+        if not args: return "Usage: net-scan <host|cidr> [ports|common] [--concurrency N] [--timeout S]"
+        try:
+            hosts = _parse_targets(args[0])
+            ports = _parse_ports(args[1] if len(args) > 1 else "common")
+            timeout = float(flags.get("timeout", 1.0))
+        except ValueError as e:
+            return f"Bad target/ports: {e}"
+        if len(hosts) * len(ports) > SCAN_MAX_PROBES:
+            return f"Too many probes ({len(hosts) * len(ports)}); max {SCAN_MAX_PROBES}."
+        sc = _PortScan(hosts, ports, _int_flag(flags, "concurrency", 200), timeout)
+        live = _emit(ctx, f"Scanning {len(hosts)} host(s) x {len(ports)} port(s) …")
+
+        def show(r):
+            if r[2] == "open":
+                _emit(ctx, f"OPEN  {r[0]}:{r[1]}  ({r[3]:.0f} ms)")
+        t0 = time.perf_counter()
+        results = sc.run(show if live else None)
+        return _scan_table(results, time.perf_counter() - t0)
+
     def whois_hint(ctx, argv):
         dom = argv[0] if argv else "example.com"
         return (
@@ -387,15 +2452,27 @@ def _net_ops() -> List[Op]:
 
     def httpget(ctx, argv):
         # optional: requests. If missing, show install hint
-        if not argv: return "Usage: net-httpget <url>"
-        url = argv[0]
+        args, flags = _split_flags(argv, ("bench",))
+        if not args: return "Usage: net-httpget <url> [--nocache] [--bench N]"
+        url = args[0]
         try:
-            import requests  # type: ignore
+            _http_session()
         except Exception:
             return "requests not installed. Install: python -m pip install requests"
+        n = _int_flag(flags, "bench", 0)
+        if n > 0:
+            ms: List[float] = []
+            try:
+                for _ in range(n):
+                    t0 = time.perf_counter()
+                    _http_get(url, use_cache=False)
+                    ms.append((time.perf_counter() - t0) * 1000)
+            except Exception as e:
+                return f"HTTP error after {len(ms)} request(s): {e}"
+            return f"GET {url} (keep-alive session, no cache)\n" + _latency_report(ms)
         try:
-            r = requests.get(url, timeout=8)
-            return _trim(r.text, 8000)
+            text, _ = _http_get(url, use_cache=not flags.get("nocache"))
+            return _trim(text, 8000)
         except Exception as e:
             return f"HTTP error: {e}"
 
@@ -403,12 +2480,11 @@ def _net_ops() -> List[Op]:
         if not argv: return "Usage: net-headers <url>"
         url = argv[0]
         try:
-            import requests  # type: ignore
+            _http_session()
         except Exception:
             return "requests not installed. Install: python -m pip install requests"
         try:
-            r = requests.get(url, timeout=8)
-            return "\n".join([f"{k}: {v}" for k, v in r.headers.items()])
+            return _http_headers(url)
         except Exception as e:
             return f"HTTP error: {e}"
 
@@ -420,18 +2496,21 @@ def _net_ops() -> List[Op]:
             "Stop with Ctrl+C in that shell."
         )
 
-    return [
-        Op("net-ip", "Show IP info", "net-ip", ip),
-        Op("net-dns", "DNS lookup", "net-dns <host>", dns),
-        Op("net-tcpcheck", "Check TCP port", "net-tcpcheck <host> <port>", tcp),
-        Op("net-whois-hint", "WHOIS hint", "net-whois-hint [domain]", whois_hint),
-        Op("net-httpget", "HTTP GET (needs requests)", "net-httpget <url>", httpget),
-        Op("net-headers", "HTTP headers (needs requests)", "net-headers <url>", headers),
-        Op("net-serve-hint", "How to start local server", "net-serve-hint [port]", serve_hint),
-    ]
+    return {
+        "net-ip": ip,
+        "net-dns": dns,
+        "net-tcpcheck": tcp,
+        "net-scan": scan,
+        "net-whois-hint": whois_hint,
+        "net-httpget": httpget,
+        "net-headers": headers,
+        "net-serve-hint": serve_hint,
+    }
 
 # SYSTEM ops (real)
-def _sys_ops() -> List[Op]:
+def _sys_ops() -> Dict[str, Callable]:
+    import platform
+
     def stats(ctx, argv):
         import psutil
         cpu = psutil.cpu_percent(interval=0.2)
@@ -475,16 +2554,18 @@ def _sys_ops() -> List[Op]:
             f"Python: {sys.version.split()[0]}"
         )
 
-    return [
-        Op("sys-stats", "CPU/RAM quick stats", "sys-stats", stats),
-        Op("sys-uptime", "Uptime", "sys-uptime", uptime),
-        Op("sys-procs", "Top processes by RAM", "sys-procs", procs),
-        Op("sys-env", "Env vars (or one)", "sys-env [KEY]", env),
-        Op("sys-osinfo", "OS + Python info", "sys-osinfo", osinfo),
-    ]
+    return {
+        "sys-stats": stats,
+        "sys-uptime": uptime,
+        "sys-procs": procs,
+        "sys-env": env,
+        "sys-osinfo": osinfo,
+    }
 
 # TEXT ops (real)
-def _text_ops() -> List[Op]:
+def _text_ops() -> Dict[str, Callable]:
+    import base64
+
     def _txt(ctx, argv): return " ".join(argv)
 
     def upper(ctx, argv): return _txt(ctx, argv).upper()
@@ -510,21 +2591,21 @@ def _text_ops() -> List[Op]:
         except Exception as e:
             return f"Regex error: {e}"
 
-    return [
-        Op("text-upper", "Uppercase", "text-upper <text...>", upper),
-        Op("text-lower", "Lowercase", "text-lower <text...>", lower),
-        Op("text-title", "Title Case", "text-title <text...>", title),
-        Op("text-strip", "Strip spaces", "text-strip <text...>", strip),
-        Op("text-reverse", "Reverse text", "text-reverse <text...>", reverse),
-        Op("text-len", "Length in chars", "text-len <text...>", len_),
-        Op("text-words", "Word count", "text-words <text...>", words),
-        Op("text-b64e", "Base64 encode", "text-b64e <text...>", base64e),
-        Op("text-b64d", "Base64 decode", "text-b64d <base64...>", base64d),
-        Op("text-regexfind", "Regex findall", "text-regexfind <pattern> <text...>", regex_find),
-    ]
+    return {
+        "text-upper": upper,
+        "text-lower": lower,
+        "text-title": title,
+        "text-strip": strip,
+        "text-reverse": reverse,
+        "text-len": len_,
+        "text-words": words,
+        "text-b64e": base64e,
+        "text-b64d": base64d,
+        "text-regexfind": regex_find,
+    }
 
 # DEV/MORE ops (real)
-def _more_ops() -> List[Op]:
+def _more_ops() -> Dict[str, Callable]:
     def calc(ctx, argv):
         if not argv: return "Usage: more-calc <expr>"
         expr = " ".join(argv)
@@ -556,13 +2637,88 @@ def _more_ops() -> List[Op]:
         h = hashlib.sha256(" ".join(argv).encode("utf-8")).hexdigest()
         return h
 
-    return [
-        Op("more-calc", "Calculator (math only)", "more-calc <expr>", calc),
-        Op("more-jsonfmt", "Format JSON text", "more-jsonfmt <json...>", jsonfmt),
-        Op("more-rand", "Random int", "more-rand [max]", rand),
-        Op("more-now", "Current time", "more-now", time_now),
-        Op("more-sha256text", "SHA256 of text", "more-sha256text <text...>", hash_text),
-    ]
+    return {
+        "more-calc": calc,
+        "more-jsonfmt": jsonfmt,
+        "more-rand": rand,
+        "more-now": time_now,
+        "more-sha256text": hash_text,
+    }
+
+_OP_INDEX: Dict[str, Op] = {op.name: op for ops in _OP_TABLE.values() for op in ops}
+
+# presets: (name template, base command, pinned argument, values, help template)
+_PRESET_SPEC = (
+    ("file-tree-d{}", "file-tree", "depth", tuple(range(1, 11)), "Tree depth preset {}"),
+    ("file-head-{}", "file-head", "lines", (5, 10, 20, 50, 100), "Head preset {}"),
+    ("file-tail-{}", "file-tail", "lines", (5, 10, 20, 50, 100), "Tail preset {}"),
+    ("net-port-{}", "net-tcpcheck", "port", tuple(COMMON_PORTS), "TCP check preset {}"),
+)
+
+class _Preset(NamedTuple):
+    name: str
+    base: str
+    bound: Dict[str, str]
+    help: str
+    usage: str
+
+_PRESETS: Dict[str, _Preset] = {}
+
+def _arg_key(decl: str) -> str:
+    return decl.strip("<>[]").split("=", 1)[0]
+
+def _build_presets() -> List[_Preset]:
+    out = []
+    for tmpl, base, key, values, help_tmpl in _PRESET_SPEC:
+        free = [d.split("=", 1)[0] + ("]" if d.startswith("[") else "") for d in _OP_INDEX[base].args if _arg_key(d) != key]
+        for v in values:
+            name = tmpl.format(v)
+            pr = _Preset(name, base, {key: str(v)}, help_tmpl.format(v), " ".join([name, *free]))
+            _PRESETS[name] = pr
+            out.append(pr)
+    return out
+
+def _run_preset(name: str, ctx, argv: List[str]):
+    pr = _PRESETS[name]
+    cut = next((i for i, a in enumerate(argv) if a.startswith("--")), len(argv))
+    user = iter(argv[:cut])
+    out: List[str] = []
+    for decl in _OP_INDEX[pr.base].args:
+        key = _arg_key(decl)
+        if key in pr.bound:
+            out.append(pr.bound[key])
+            continue
+        v = next(user, None)
+        if v is None:
+            if decl.startswith("<"):
+                return f"Usage: {pr.usage}"
+            v = decl[1:-1].split("=", 1)[1]
+        out.append(v)
+    return _op_handler(pr.base)(ctx, out + argv[cut:])
+
+_OP_FACTORIES: Dict[str, Callable[[], Dict[str, Callable]]] = {
+    "file": _file_ops,
+    "net": _net_ops,
+    "sys": _sys_ops,
+    "text": _text_ops,
+    "more": _more_ops,
+}
+_HANDLERS: Dict[str, Callable] = {}
+_HANDLERS_LOCK = threading.Lock()
+
+def _op_handler(name: str) -> Callable:
+    fn = _HANDLERS.get(name)
+    if fn is None:
+        with _HANDLERS_LOCK:
+            if name not in _HANDLERS:
+                _HANDLERS.update(_OP_FACTORIES[name.split("-", 1)[0]]())
+        fn = _HANDLERS[name]
+    return fn
+
+def _lazy_op(name: str) -> Callable:
+    def call(ctx, argv):
+        return _op_handler(name)(ctx, argv)
+    return call
 
 # ---------------- spam section (optional) ----------------
 def _enable_spam_aliases(host, real_names: List[str], count: int = 250):
@@ -575,6 +2731,173 @@ def _enable_spam_aliases(host, real_names: List[str], count: int = 250):
             return f"Spam alias -> {t}\nTry: help {t}"
         _reg(host, name, f"Spam alias (sectioned) -> {target}", f"{name}", handler, "spam")
 
+# ---------------- server app supervisor (IDSPcommands start/stop/status/logs/restart) ----------------
+SERVER_LOG_DIR = os.path.join(SERVER_DIR, "logs")
+SUPERVISE_BACKOFF_MAX = 60.0
+SUPERVISE_STABLE = 60.0
+SUPERVISE_STOP_GRACE = 5.0
+SUPERVISE_LOG_MAX = SPOOL_MAX
+
+def _app_cmd(path: str, args: List[str]) -> List[str]:
+    if path.lower().endswith((".py", ".pyw")):
+        return [sys.executable, "-u", path, *args]
+    return [path, *args]
+
+def _manifest_running(name: str, rec: Optional[dict]) -> None:
+    def edit(data: dict) -> None:
+        running = data.get("running") if isinstance(data.get("running"), dict) else {}
+        if rec is None:
+            running.pop(name, None)
+        else:
+            running[name] = rec
+        data["running"] = running
+    _MANIFEST.update(edit)
+
+class _Managed:
+    def __init__(self, name: str, cmd: List[str], check: Optional[Callable[[], Tuple[bool, str]]] = None,
+                 notify: Optional[Callable[[str], None]] = None):
+        self.name = name
+        self.cmd = cmd
+        self.check = check
+        self.notify = notify
+        self.proc: Optional[subprocess.Popen] = None
+        self.state = "starting"
+        self.started = 0.0
+        self.restarts = 0
+        self.last_exit: Optional[int] = None
+        self.backoff = 1.0
+        self.log_path = os.path.join(SERVER_LOG_DIR, f"{name}.log")
+        self._stop = threading.Event()
+        self._ps = None
+        self._thread = threading.Thread(target=self._loop, name=f"supervise-{name}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _spawn(self, log: _RotatingWriter) -> None:
+        log.write(f"===== {_now()} start: {subprocess.list2cmdline(self.cmd)} =====\n")
+        log.flush()
+        self.proc = subprocess.Popen(
+            self.cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+        )
+        self.started = time.time()
+        self.state = "running"
+        self._ps = None
+        _manifest_running(self.name, {"pid": self.proc.pid, "cmd": self.cmd, "started": self.started})
+
+    def _loop(self) -> None:
+        log = _RotatingWriter(self.log_path, SUPERVISE_LOG_MAX)
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._spawn(log)
+                except Exception as e:
+                    log.write(f"===== {_now()} spawn failed: {e} =====\n")
+                    self.state = "failed"
+                    self._notify(f"{self.name}: start failed: {e}")
+                    break
+                read = getattr(self.proc.stdout, "read1", self.proc.stdout.read)
+                last_flush = time.time()
+                while True:
+                    b = read(65536)
+                    if not b:
+                        break
+                    log.write(b.decode("utf-8", errors="replace"))
+                    if len(b) < 65536 or time.time() - last_flush > 0.5:
+                        log.flush()
+                        last_flush = time.time()
+                self.last_exit = self.proc.wait()
+                up = time.time() - self.started
+                log.write(f"\n===== {_now()} exit {self.last_exit} after {up:.1f}s =====\n")
+                log.flush()
+                if self._stop.is_set():
+                    break
+                # exited: restart with exponential backoff
+                if up >= SUPERVISE_STABLE:
+                    self.backoff = 1.0
+                delay = self.backoff
+                self.backoff = min(self.backoff * 2, SUPERVISE_BACKOFF_MAX)
+                self.state = "backoff"
+                self.restarts += 1
+                log.write(f"===== restart #{self.restarts} in {delay:.0f}s =====\n")
+                log.flush()
+                if self._stop.wait(delay):
+                    break
+                if self.check is not None:
+                    ok, note = self.check()
+                    if not ok:
+                        log.write(f"===== {_now()} not restarting =====\n{note}\n")
+                        self.state = "failed"
+                        self._notify(f"{self.name}: not restarting\n{note}")
+                        break
+        finally:
+            if self.state != "failed":
+                self.state = "stopped"
+            log.close()
+            _manifest_running(self.name, None)
+
+    def _notify(self, text: str) -> None:
+        if self.notify is not None:
+            try:
+                self.notify(text)
+            except Exception:
+                pass
+
+    def stop(self, grace: float = SUPERVISE_STOP_GRACE) -> None:
+        self._stop.set()
+        p = self.proc
+        if p is not None and p.poll() is None:
+            p.terminate()
+            try:
+                p.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        self._thread.join(timeout=grace + 2)
+
+    def pid(self) -> Optional[int]:
+        return self.proc.pid if self.proc is not None and self.proc.poll() is None else None
+
+    def usage(self) -> str:
+        pid = self.pid()
+        if pid is None:
+            return ""
+        try:
+            import psutil
+        except Exception:
+            return "(psutil missing)"
+        try:
+            if self._ps is None or self._ps.pid != pid:
+                self._ps = psutil.Process(pid)
+                self._ps.cpu_percent(interval=0.1)
+            cpu = self._ps.cpu_percent(interval=None)
+            rss = self._ps.memory_info().rss
+            return f"CPU {cpu:5.1f}%  RSS {_human_bytes(rss)}"
+        except Exception:
+            return ""
+
+_SUPERVISED: Dict[str, _Managed] = {}
+
+def _supervise_start(name: str, cmd: List[str], check: Optional[Callable[[], Tuple[bool, str]]] = None,
+                     notify: Optional[Callable[[str], None]] = None) -> _Managed:
+    m = _SUPERVISED.get(name)
+    if m is not None and m.state not in ("stopped", "failed"):
+        return m
+    m = _Managed(name, cmd, check, notify)
+    _SUPERVISED[name] = m
+    m.start()
+    return m
+
+def _orphan_pid(name: str) -> Optional[int]:
+    rec = _load_manifest().get("running", {}).get(name)
+    if not isinstance(rec, dict) or name in _SUPERVISED:
+        return None
+    try:
+        import psutil
+        pid = int(rec.get("pid", 0))
+        return pid if pid and psutil.pid_exists(pid) else None
+    except Exception:
+        return None
+
 # ---------------- IDSPcommands (server apps) ----------------
 def _idspcommands(host):
     def idsp(ctx, argv):
@@ -584,6 +2907,8 @@ def _idspcommands(host):
         IDSPcommands add <name> <path>
         IDSPcommands remove <name>
         IDSPcommands run <name> <args...>
+        IDSPcommands start|restart <name> <args...>
+        IDSPcommands stop|status|logs <name>
         IDSPcommands where
         """
         if not argv or argv[0].lower() in ("help", "-h", "/?"):
@@ -593,9 +2918,15 @@ def _idspcommands(host):
                 "  1) put app exe into BetterEditPMF/server_apps/\n"
                 "  2) IDSPcommands scan <file>   -> SHA256 + VirusTotal link\n"
                 "  3) (after YOU verify) IDSPcommands add <name> <path>\n"
-                "  4) IDSPcommands run <name> <args...>\n"
+                "  4) IDSPcommands run <name> <args...>   (runs as a job, --wait to block)\n"
+                "     or IDSPcommands start <name> <args...>   (long-running server, supervised)\n"
+                "\nSupervised servers (auto-restart with backoff, log in server_apps/logs/):\n"
+                "  IDSPcommands start|restart <name> <args...>\n"
+                "  IDSPcommands stop <name>\n"
+                "  IDSPcommands status [name]\n"
+                "  IDSPcommands logs <name> [lines]\n"
                 "\nCommands:\n"
-                "  IDSPcommands list | where | scan | add | remove | run"
+                "  IDSPcommands list | where | scan | add | remove | run | start | stop | status | logs | restart"
             )
 
         sub = argv[0].lower()
@@ -610,7 +2941,9 @@ def _idspcommands(host):
                 return "(no server apps registered)"
             out = ["Registered server apps:"]
             for k in sorted(apps.keys()):
-                out.append(f"- {k}: {apps[k]}")
+                e = apps[k]
+                pin = f"  sha256 {e['sha256'][:16]}…" if isinstance(e, dict) and e.get("sha256") else "  (unpinned)"
+                out.append(f"- {k}: {_app_path(e)}{pin}")
             return "\n".join(out)
 
         if sub == "scan":
@@ -620,8 +2953,11 @@ def _idspcommands(host):
                 path = os.path.abspath(path)
             if not os.path.isfile(path):
                 return "File not found."
-            sha = _sha256_file(path)
-            return f"SHA256: {sha}\nVirusTotal: {_vt_link(sha)}\n\nUpload/check this hash on VirusTotal BEFORE adding."
+            sha, hit = _sha256_cached(path)
+            if not hit:
+                _hash_cache_save()
+            note = " (cached, file unchanged)" if hit else ""
+            return f"SHA256: {sha}{note}\nVirusTotal: {_vt_link(sha)}\n\nUpload/check this hash on VirusTotal BEFORE adding."
 
         if sub == "add":
             if len(argv) < 3: return "Usage: IDSPcommands add <name> <path>"
@@ -631,10 +2967,10 @@ def _idspcommands(host):
                 path = os.path.abspath(path)
             if not os.path.isfile(path):
                 return "File not found."
-            apps[name] = path
+            apps[name] = _app_pin(path)
             data["apps"] = apps
             _save_manifest(data)
-            return f"OK added: {name}"
+            return f"OK added: {name}\nSHA256: {apps[name]['sha256']} (run/start refuse to launch if it changes)"
 
         if sub == "remove":
             if len(argv) < 2: return "Usage: IDSPcommands remove <name>"
@@ -651,16 +2987,104 @@ def _idspcommands(host):
             name = argv[1]
             if name not in apps:
                 return "Not found. Use: IDSPcommands list"
-            exe = apps[name]
+            ok, note = _app_verify(apps[name])
+            if not ok:
+                return note
+            if note == "ok (rehashed)":
+                _save_manifest(data)
+            exe = _app_path(apps[name])
+
+            def run(jctx, args):
+                cap, streamed = _live_capture(jctx, spool=f"idsp-{name}")
+                try:
+                    out = _run_capture([exe, *args], cap=cap)
+                    return f"(done, {cap.summary()})" if streamed[0] else (out.strip() or "(no output)")
+                except subprocess.TimeoutExpired:
+                    return f"Timeout (25s). If it's a long-running server, use: IDSPcommands start {name}"
+                except Exception as e:
+                    return f"Run error: {e}"
+            return _job_handler(f"IDSPcommands run {name}", run)(ctx, argv[2:])
+
+        if sub in ("start", "restart"):
+            if len(argv) < 2: return f"Usage: IDSPcommands {sub} <name> <args...>"
+            name = argv[1]
+            if name not in apps:
+                return "Not found. Use: IDSPcommands list"
+            ok, note = _app_verify(apps[name])
+            if not ok:
+                return note
+            if note == "ok (rehashed)":
+                _save_manifest(data)
+            exe = _app_path(apps[name])
+            m = _SUPERVISED.get(name)
             args = argv[2:]
+            if sub == "restart" and m is not None:
+                if not args:
+                    args = m.cmd[len(_app_cmd(exe, [])):]
+                m.stop()
+            elif m is not None and m.state not in ("stopped", "failed"):
+                return f"{name} already {m.state} (pid {m.pid()}). Use: IDSPcommands restart {name}"
+            if _orphan_pid(name):
+                return f"{name} is still running from an earlier session (pid {_orphan_pid(name)}). Use: IDSPcommands stop {name}"
+            entry = apps[name]
+            m = _supervise_start(name, _app_cmd(exe, args), lambda: _app_verify(entry),
+                                 lambda text: _job_post(ctx, f"[IDSPcommands] {text}"))
+            return f"OK {sub}ing {name}, log: {m.log_path}\nCheck: IDSPcommands status {name}"
+
+        if sub == "stop":
+            if len(argv) < 2: return "Usage: IDSPcommands stop <name>"
+            name = argv[1]
+            m = _SUPERVISED.get(name)
+            if m is not None and m.state not in ("stopped", "failed"):
+                m.stop()
+                return f"OK stopped {name} (exit {m.last_exit})"
+            pid = _orphan_pid(name)
+            if pid:
+                try:
+                    import psutil
+                    p = psutil.Process(pid)
+                    p.terminate()
+                    try:
+                        p.wait(timeout=SUPERVISE_STOP_GRACE)
+                    except psutil.TimeoutExpired:
+                        p.kill()
+                except Exception as e:
+                    return f"Stop error: {e}"
+                _manifest_running(name, None)
+                return f"OK stopped {name} (pid {pid}, earlier session)"
+            return f"{name} is not running."
+
+        if sub == "status":
+            names = [argv[1]] if len(argv) > 1 else sorted(set(_SUPERVISED) | set(data.get("running", {})))
+            if not names:
+                return "(no supervised servers)"
+            out = []
+            for name in names:
+                m = _SUPERVISED.get(name)
+                if m is None:
+                    pid = _orphan_pid(name)
+                    out.append(f"{name:<16} {'detached' if pid else 'stopped':<9} pid {pid or '-'}  (earlier session)")
+                    continue
+                pid = m.pid()
+                up = f"uptime {time.time() - m.started:.0f}s" if pid else ""
+                last = "-" if m.last_exit is None else m.last_exit
+                out.append(f"{name:<16} {m.state:<9} pid {pid or '-':<7} {up:<14} restarts {m.restarts}  last exit {last}  {m.usage()}".rstrip())
+            return "\n".join(out)
+
+        if sub == "logs":
+            if len(argv) < 2: return "Usage: IDSPcommands logs <name> [lines]"
+            name = argv[1]
             try:
-                cp = subprocess.run([exe, *args], capture_output=True, text=True, timeout=25)
-                out = (cp.stdout or "") + (("\n" + cp.stderr) if cp.stderr else "")
-                return _trim(out, 8000) or "(no output)"
-            except subprocess.TimeoutExpired:
-                return "Timeout (25s). If it's a long-running server, run it via AI1cmd shell in an external terminal."
-            except Exception as e:
-                return f"Run error: {e}"
+                n = int(argv[2]) if len(argv) > 2 else 50
+            except ValueError:
+                return "lines must be a number"
+            log = os.path.join(SERVER_LOG_DIR, f"{name}.log")
+            if not os.path.isfile(log):
+                return "(no log yet)"
+            lines = _tail_lines(log, n).splitlines()
+            if len(lines) < n and os.path.isfile(log + ".1"):
+                lines = _tail_lines(log + ".1", n - len(lines)).splitlines() + lines
+            return "\n".join(lines) or "(empty log)"
 
         return "Unknown. Try: IDSPcommands help"
 
@@ -680,16 +3104,20 @@ def _ai1cmd(host):
                 "  AI1cmd pack counts\n"
                 "  AI1cmd shell list\n"
                 "  AI1cmd shell set <powershell|pwsh|cmd|bash|gitbash>\n"
-                "  AI1cmd shell run <command...>\n"
+                "  AI1cmd shell run [--wait] <command...>   (runs as a job, persistent shell)\n"
+                "  AI1cmd shell pool | restart | spawn on|off\n"
                 "  AI1cmd spam on|off\n"
-                "  pack-list [prefix]\n"
+                "  pack-list [prefix] [--page N]\n"
+                "  jobs | job-wait <id> | job-kill <id>\n"
+                "  perf-stats [prefix] | on | off | reset   perf-profile <command...>\n"
+                "  bench [case-prefix] [--repeat N] [--warmup N]   (results: data/bench/*.json)\n"
             )
 
         sub = argv[0].lower()
 
         if sub == "pack" and len(argv) > 1 and argv[1].lower() == "counts":
-            names = sorted(set(ctx.app.cmds.all_names()))
-            def c(p): return len([n for n in names if n.startswith(p)])
+            index = _sync_cmd_index(ctx)
+            def c(p): return index.count(p.rstrip("-"))
             return (
                 f"{PACK_NAME}\n"
                 f"file-*: {c('file-')}\n"
@@ -704,7 +3132,7 @@ def _ai1cmd(host):
 
         if sub == "shell":
             if len(argv) < 2:
-                return "Usage: AI1cmd shell list|set|run ..."
+                return "Usage: AI1cmd shell list|set|run|pool|restart|spawn ..."
 
             action = argv[1].lower()
             if action == "list":
@@ -738,9 +3166,11 @@ def _ai1cmd(host):
                 return f"OK. shell={pick}"
 
             if action == "run":
-                if len(argv) < 3:
-                    return "Usage: AI1cmd shell run <command...>"
-                cmdline = " ".join(argv[2:]).strip()
+                wait = argv[2:3] == ["--wait"]
+                rest = argv[3:] if wait else argv[2:]
+                if not rest:
+                    return "Usage: AI1cmd shell run [--wait] <command...>"
+                cmdline = " ".join(rest).strip()
                 st = _get_state(ctx)
                 shell = st.get("shell", "powershell")
 
@@ -753,14 +3183,40 @@ def _ai1cmd(host):
                     if not base:
                         return "Shell not set."
 
-                try:
-                    cp = subprocess.run(base + [cmdline], capture_output=True, text=True, timeout=25)
-                    out = (cp.stdout or "") + (("\n" + cp.stderr) if cp.stderr else "")
-                    return _trim(out, 8000) or "(no output)"
-                except Exception as e:
-                    return f"Failed: {e}"
+                def run(jctx, args):
+                    try:
+                        cap, streamed = _live_capture(jctx, spool=f"shell-{shell}")
+                        if st.get("shell_spawn"):
+                            out, code = _run_capture(base + [cmdline], cap=cap), 0
+                        else:
+                            out, code = _shell_pool(shell).run(cmdline, cap=cap)
+                        tail = f"\n(exit {code})" if code else ""
+                        if streamed[0]:
+                            return f"(done, {cap.summary()}){tail}"
+                        return (out.strip() or "(no output)") + tail
+                    except Exception as e:
+                        return f"Failed: {e}"
+                return _job_handler("AI1cmd shell run", run)(ctx, [cmdline] + (["--wait"] if wait else []))
+
+            if action == "pool":
+                rows = [r for pool in _SHELL_POOLS.values() for r in pool.status()]
+                return "Persistent shells:\n" + ("\n".join(rows) if rows else "(none started)")
+
+            if action == "restart":
+                st = _get_state(ctx)
+                pool = _shell_pool(st.get("shell", "powershell"))
+                pool.restart()
+                return f"OK. {pool.profile} shells restart on next run."
+
+            if action == "spawn":
+                if len(argv) < 3 or argv[2].lower() not in ("on", "off"):
+                    return "Usage: AI1cmd shell spawn on|off   (on = new process per run, old behavior)"
+                st = _get_state(ctx)
+                st["shell_spawn"] = argv[2].lower() == "on"
+                _set_state(ctx, st)
+                return f"OK shell_spawn={'on' if st['shell_spawn'] else 'off'}"
 
-            return "Usage: AI1cmd shell list|set|run ..."
+            return "Usage: AI1cmd shell list|set|run|pool|restart|spawn ..."
 
         if sub == "spam":
             if len(argv) < 2:
@@ -775,20 +3231,72 @@ def _ai1cmd(host):
     _reg(host, "AI1cmd", "AI1 hub (shell chooser + pack)", "AI1cmd help", ai1cmd, "plugin", aliases=["ai1cmd"])
 
 # ---------------- pack-list (clean) ----------------
+def _sync_cmd_index(ctx) -> _CmdIndex:
+    index = _ctx_registry(ctx)[0]
+    try:
+        index.sync(ctx.app.cmds.all_names())
+    except Exception:
+        pass
+    return index
+
 def _pack_list(host):
     def pack_list(ctx, argv):
-        pref = (argv[0].lower() if argv else "")
-        names = sorted(set(ctx.app.cmds.all_names()))
+        args, flags = _split_flags(argv, ("page", "per"))
+        pref = (args[0].lower() if args else "")
+        index = _sync_cmd_index(ctx)
         # default: hide spam-* unless explicitly asked
-        if not pref:
-            show = [n for n in names if (n.startswith("file-") or n.startswith("net-") or n.startswith("sys-") or n.startswith("text-") or n.startswith("more-") or n.startswith("meme-") or n in ("AI1cmd", "IDSPcommands", "pack-list"))]
-        else:
-            show = [n for n in names if n.lower().startswith(pref)]
-        show = sorted(set(show))
+        show = index.prefix(pref) if pref else index.default_view()
         if not show:
-            return "(no matches)"
-        return "\n".join(show[:350]) + ("\n…(trimmed)…" if len(show) > 350 else "")
-    _reg(host, "pack-list", "List packs (clean, no spam by default)", "pack-list [prefix]", pack_list, "plugin")
+            near = index.suggest(pref) if pref else []
+            return "(no matches)" + (f"\nDid you mean: {', '.join(near)}" if near else "")
+        per = max(1, _int_flag(flags, "per", PACK_LIST_PAGE))
+        pages = max(1, (len(show) + per - 1) // per)
+        page = min(max(1, _int_flag(flags, "page", 1)), pages)
+        out = show[(page - 1) * per: page * per]
+        if pages > 1:
+            out.append(f"…page {page}/{pages} ({len(show)} commands)" + (f" — next: --page {page + 1}" if page < pages else ""))
+        return "\n".join(out)
+    _reg(host, "pack-list", "List packs (clean, no spam by default)", "pack-list [prefix] [--page N] [--per N]", pack_list, "plugin")
+
+# ---------------- jobs ----------------
+def _jobs(host):
+    def jobs(ctx, argv):
+        with _JOB_LOCK:
+            rows = list(_JOBS.values())
+        if not rows:
+            return "(no jobs)"
+        return "  ID  STATUS    ELAPSED  COMMAND\n" + "\n".join(_job_row(j) for j in rows)
+
+    def job_wait(ctx, argv):
+        if not argv or not argv[0].isdigit(): return "Usage: job-wait <id> [seconds]"
+        job = _JOBS.get(int(argv[0]))
+        if job is None:
+            return "No such job. Use: jobs"
+        secs = float(argv[1]) if len(argv) > 1 and argv[1].replace(".", "", 1).isdigit() else JOB_WAIT_DEFAULT
+        deadline = time.time() + secs
+        while not job.ended and time.time() < deadline:
+            time.sleep(0.05)
+            _pump_ui()
+        if not job.ended:
+            return f"Still running after {secs:.0f}s.\n" + _job_row(job)
+        out = job.output.render().rstrip("\n")
+        return "\n".join(x for x in (_job_row(job), out, job.result) if x)
+
+    def job_kill(ctx, argv):
+        if not argv or not argv[0].isdigit(): return "Usage: job-kill <id>"
+        job = _JOBS.get(int(argv[0]))
+        if job is None:
+            return "No such job. Use: jobs"
+        if job.ended:
+            return f"Job {job.id} already {job.status}."
+        job.kill()
+        if job.future is not None and job.future.cancelled():
+            job.status, job.ended = "killed", time.time()
+        return f"Kill requested for job {job.id} (child processes terminated; Python work stops at its next check)."
+
+    _reg(host, "jobs", "List background jobs", "jobs", jobs, "plugin")
+    _reg(host, "job-wait", "Wait for a job and show its output", "job-wait <id> [seconds]", job_wait, "plugin")
+    _reg(host, "job-kill", "Cancel a job / kill its processes", "job-kill <id>", job_kill, "plugin")
 
 # ---------------- memes (25+) ----------------
 def _memes(host):
@@ -841,63 +3349,57 @@ def _memes(host):
     for n, d in MEMES:
         _reg(host, n, d, f"{n} [text...]", meme_handler(n, d), "meme", aliases=[n.replace("meme-", "m")])
 
+# ---------------- bench (suite lives in bench_ai1cmd.py) ----------------
+def _bench(host):
+    def bench(ctx, argv):
+        import bench_ai1cmd
+        args, flags = _split_flags(argv, ("repeat", "warmup", "files", "mb", "text-kb"))
+        report = bench_ai1cmd.run_suite(
+            repeat=max(1, _int_flag(flags, "repeat", 5)), warmup=max(0, _int_flag(flags, "warmup", 1)),
+            files=max(100, _int_flag(flags, "files", 5000)), big_mb=max(1, _int_flag(flags, "mb", 32)),
+            text_kb=max(1, _int_flag(flags, "text-kb", 1024)), only=args[0] if args else "",
+            progress=lambda line: _emit(ctx, line),
+        )
+        path, prev = bench_ai1cmd.save_report(report)
+        return bench_ai1cmd.report_table(report, prev) + f"\nsaved: {path}"
+
+    _reg(host, "bench", "Benchmark the pack's hot paths on generated data (JSON to data/bench)",
+         "bench [case-prefix] [--repeat N] [--warmup N] [--files N] [--mb N] [--text-kb N]",
+         _job_handler("bench", bench), "plugin")
+
 # ---------------- register ----------------
 def register(host):
+    global _JOB_BRIDGE
+    if _JOB_BRIDGE is None:
+        _JOB_BRIDGE = _make_job_bridge()
+    _warm_shells()
+    _register_commands(host)
+
+def _op_job(op: Op, title: str, fn: Callable) -> Callable:
+    if not op.job:
+        return fn
+    return _job_handler(title, fn, None if op.job is True else op.job)
+
+def _register_commands(host):
     # core hubs
     _ai1cmd(host)
     _pack_list(host)
     _idspcommands(host)
+    _jobs(host)
+    _perf(host)
+    _bench(host)
 
-    # real ops
-    real_ops: List[Op] = []
-    real_ops += _file_ops()
-    real_ops += _net_ops()
-    real_ops += _sys_ops()
-    real_ops += _text_ops()
-    real_ops += _more_ops()
-
-    # Register real ops
-    for op in real_ops:
-        _reg(host, op.name, op.help, op.usage, op.fn, op.name.split("-", 1)[0])
+    # Register real ops (metadata only; handlers are built on first call)
+    for group, ops in _OP_TABLE.items():
+        for op in ops:
+            fn = _lazy_op(op.name)
+            _reg(host, op.name, op.help, op.usage, _op_job(op, op.name, fn), group)
 
     # Multiply REAL commands meaningfully (presets), without trashy 01..60 spam
     # These are still real because they change behavior (depth presets, head/tail presets, tcp common ports, etc.)
-    preset_names: List[str] = []
-
-    # file-tree depth presets (10)
-    for d in range(1, 11):
-        name = f"file-tree-d{d}"
-        def h(ctx, argv, depth=d):
-            path = argv[0] if argv else "."
-            return [op for op in real_ops if op.name == "file-tree"][0].fn(ctx, [path, str(depth)])
-        _reg(host, name, f"Tree depth preset {d}", f"{name} [path]", h, "file")
-        preset_names.append(name)
-
-    # head/tail presets (10 each)
-    for lines in [5, 10, 20, 50, 100]:
-        name = f"file-head-{lines}"
-        def h(ctx, argv, ln=lines):
-            if not argv: return f"Usage: {name} <file>"
-            return [op for op in real_ops if op.name == "file-head"][0].fn(ctx, [argv[0], str(ln)])
-        _reg(host, name, f"Head preset {lines}", f"{name} <file>", h, "file")
-        preset_names.append(name)
-
-        name2 = f"file-tail-{lines}"
-        def t(ctx, argv, ln=lines):
-            if not argv: return f"Usage: {name2} <file>"
-            return [op for op in real_ops if op.name == "file-tail"][0].fn(ctx, [argv[0], str(ln)])
-        _reg(host, name2, f"Tail preset {lines}", f"{name2} <file>", t, "file")
-        preset_names.append(name2)
-
-    # net common port checks (20)
-    common_ports = [21, 22, 23, 25, 53, 80, 110, 143, 443, 445, 3306, 5432, 6379, 8080, 8443, 27017, 1883, 9000, 9090, 9200]
-    for port in common_ports:
-        name = f"net-port-{port}"
-        def p(ctx, argv, prt=port):
-            if not argv: return f"Usage: {name} <host>"
-            return [op for op in real_ops if op.name == "net-tcpcheck"][0].fn(ctx, [argv[0], str(prt)])
-        _reg(host, name, f"TCP check preset {port}", f"{name} <host>", p, "net")
-        preset_names.append(name)
+    for pr in _build_presets():
+        fn = functools.partial(_run_preset, pr.name)
+        _reg(host, pr.name, pr.help, pr.usage, _op_job(_OP_INDEX[pr.base], pr.name, fn), pr.base.split("-", 1)[0])
 
     # memes
     _memes(host)
@@ -0,0 +1,190 @@
+# BetterEditPMF/bec_state.py
+# Shared JSON state store: cached reads, debounced atomic writes (tmp + os.replace).
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import atexit
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEBOUNCE = 0.25
+RETRY = 5.0
+
+def _copy(o: Any) -> Any:
+    if isinstance(o, dict):
+        return {k: _copy(v) for k, v in o.items()}
+    if isinstance(o, list):
+        return [_copy(v) for v in o]
+    return o
+
+class JsonStore:
+    def __init__(self, path: str, default: Optional[Callable[[], Any]] = None,
+                 compact: bool = False, debounce: float = DEBOUNCE):
+        self.path = path
+        self.default = default or dict
+        self.compact = compact
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        self._data: Any = None
+        self._sig: Optional[Tuple[int, int]] = None
+        self._dirty = False
+        self._snapshot: Optional[Callable[[], Any]] = None
+        self._timer: Optional[threading.Timer] = None
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+        self.saves = 0
+        self.errors = 0
+        self.last_error = ""
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def load(self) -> Any:
+        with self._lock:
+            if self._dirty:
+                self._take_snapshot()
+                self.hits += 1
+                return _copy(self._data)
+            sig = self._stat()
+            if self._data is not None and sig == self._sig:
+                self.hits += 1
+                return _copy(self._data)
+            data = self.default()
+            if sig is not None:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    self.reads += 1
+                except Exception:
+                    data = self.default()
+            self._data, self._sig = data, sig
+            return _copy(data)
+
+    def save(self, data: Any, now: bool = False) -> None:
+        with self._lock:
+            self.saves += 1
+            self._data = _copy(data)
+            self._snapshot = None
+            self._mark_dirty(now)
+
+    def touch(self, snapshot: Callable[[], Any], now: bool = False, lazy: bool = False) -> None:
+        # marks the store dirty; snapshot() is called at write time, under the store lock
+        # lazy=True: no write is scheduled, the data goes out with the next one or at exit
+        with self._lock:
+            self.saves += 1
+            self._snapshot = snapshot
+            if lazy:
+                self._dirty = True
+            else:
+                self._mark_dirty(now)
+
+    def _mark_dirty(self, now: bool) -> None:
+        self._dirty = True
+        if now or self.debounce <= 0:
+            self._flush_locked()
+        elif self._timer is None:
+            self._schedule(self.debounce)
+
+    def _schedule(self, delay: float) -> None:
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            try:
+                self._flush_locked()
+            except Exception:
+                pass
+
+    def _take_snapshot(self) -> None:
+        if self._snapshot is not None:
+            self._data, self._snapshot = self._snapshot(), None
+
+    def update(self, fn: Callable[[Any], None], now: bool = False) -> Any:
+        with self._lock:
+            data = self.load()
+            fn(data)
+            self.save(data, now=now)
+            return data
+
+    def flush(self) -> None:
+        # raises if the write fails; a retry is scheduled
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._dirty:
+            return
+        try:
+            self._take_snapshot()
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                if self.compact:
+                    json.dump(self._data, f, separators=(",", ":"), ensure_ascii=False)
+                else:
+                    json.dump(self._data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            sys.stderr.write(f"bec_state: could not write {self.path}: {self.last_error}\n")
+            self._schedule(RETRY)
+            raise
+        self._dirty = False
+        self.writes += 1
+        self._sig = self._stat()
+
+    def remove(self) -> bool:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._dirty = False
+            self._data = self._sig = self._snapshot = None
+            try:
+                os.remove(self.path)
+                return True
+            except OSError:
+                return False
+
+    def stats(self) -> Dict[str, int]:
+        return {"reads": self.reads, "hits": self.hits, "saves": self.saves, "writes": self.writes,
+                "errors": self.errors}
+
+_STORES: Dict[str, JsonStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def store(path: str, **kwargs) -> JsonStore:
+    key = os.path.normcase(os.path.abspath(path))
+    with _STORES_LOCK:
+        s = _STORES.get(key)
+        if s is None:
+            s = _STORES[key] = JsonStore(path, **kwargs)
+        return s
+
+def flush_all() -> None:
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+    for s in stores:
+        try:
+            s.flush()
+        except Exception:
+            pass
+
+atexit.register(flush_all)
@@ -0,0 +1,668 @@
+# BetterEditPMF/bench_ai1cmd.py
+# Benchmarks for ai1cmd_pack hot paths (no AI1 needed).
+# Run (PowerShell):
+#   cd "C:\Users\lrazy\Documents\All in One 1.0.0\BetterEditPMF"
+#   python bench_ai1cmd.py findtext --files 100000
+#   python bench_ai1cmd.py ls --entries 50000
+#   python bench_ai1cmd.py scan
+#   python bench_ai1cmd.py shell --runs 100
+#   python bench_ai1cmd.py state --ticks 24
+#   python bench_ai1cmd.py startup --runs 10
+#   python bench_ai1cmd.py supervise
+#   python bench_ai1cmd.py suite --repeat 5 --warmup 1
+
+import os
+import sys
+import json
+import time
+import shutil
+import statistics
+import subprocess
+import argparse
+import tempfile
+import socket
+
+PMF_DIR = os.path.abspath(os.path.dirname(__file__))
+if PMF_DIR not in sys.path:
+    sys.path.insert(0, PMF_DIR)
+
+import ai1cmd_pack as pack  # noqa: E402
+import bec_state  # noqa: E402
+
+def make_tree(root, files, per_dir=200, needle_every=997):
+    # <files> small .py files, a few containing NEEDLE; one 1 MB file with NEEDLE past 200 KB
+    n = 0
+    d = 0
+    while n < files:
+        sub = os.path.join(root, f"pkg{d // 50:03d}", f"mod{d:05d}")
+        os.makedirs(sub, exist_ok=True)
+        for _ in range(min(per_dir, files - n)):
+            body = "import os\n" * 20
+            if n % needle_every == 0:
+                body += "x = 'NEEDLE'\n"
+            with open(os.path.join(sub, f"f{n:06d}.py"), "w", encoding="utf-8") as f:
+                f.write(body)
+            n += 1
+        d += 1
+    with open(os.path.join(root, "big.py"), "w", encoding="utf-8") as f:
+        f.write("# filler\n" * 120000 + "NEEDLE = 1\n")
+
+def legacy_findtext(root, text, ext):
+    # the pre-engine implementation (single thread, 200 KB read limit)
+    hits = []
+    for r, _, files in os.walk(root):
+        for fn in files:
+            if not fn.lower().endswith(ext):
+                continue
+            p = os.path.join(r, fn)
+            try:
+                content = pack._read_text(p, limit=200000)
+                if text in content:
+                    hits.append(p)
+                    if len(hits) >= 200:
+                        return hits
+            except Exception:
+                pass
+    return hits
+
+def legacy_ls(path):
+    # the pre-scandir file-ls body, without the 400 cap
+    out = []
+    for it in sorted(os.listdir(path)):
+        fp = os.path.join(path, it)
+        out.append(("<DIR>" if os.path.isdir(fp) else "     ") + " " + it)
+    return out
+
+def legacy_tree(root, depth):
+    lines = [root]
+
+    def walk(p, d, prefix):
+        if d < 0:
+            return
+        items = sorted(os.listdir(p))
+        for i, it in enumerate(items):
+            fp = os.path.join(p, it)
+            last = i == len(items) - 1
+            lines.append(prefix + ("└─ " if last else "├─ ") + it + ("/" if os.path.isdir(fp) else ""))
+            if os.path.isdir(fp) and d > 0:
+                walk(fp, d - 1, prefix + ("   " if last else "│  "))
+    walk(root, depth, "")
+    return lines
+
+def make_flat_dir(root, entries):
+    # one directory with <entries> children, every 10th is a folder holding 3 files
+    for i in range(entries):
+        if i % 10 == 0:
+            sub = os.path.join(root, f"d{i:06d}")
+            os.makedirs(sub, exist_ok=True)
+            for j in range(3):
+                open(os.path.join(sub, f"x{j}.txt"), "w").close()
+        else:
+            open(os.path.join(root, f"f{i:06d}.txt"), "w").close()
+
+def open_listeners(count):
+    # <count> idle listeners on 127.0.0.1 (kernel-assigned ports)
+    import socket
+    socks = []
+    for _ in range(count):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        s.listen(64)
+        socks.append(s)
+    return socks
+
+def open_filtered(count):
+    import socket
+    socks = []
+    ports = []
+    for _ in range(count):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        s.listen(0)
+        c = socket.socket()
+        c.settimeout(0.5)
+        try:
+            c.connect(s.getsockname())
+        except OSError:
+            pass
+        socks += [s, c]
+        ports.append(s.getsockname()[1])
+    return socks, ports
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return time.perf_counter() - t0, res
+
+def bench_findtext(args):
+    root = args.root or tempfile.mkdtemp(prefix="ai1bench_")
+    made = not args.root
+    try:
+        if made:
+            print(f"generating {args.files} files in {root} …")
+            make_tree(root, args.files)
+        t_old, old = timed(legacy_findtext, root, "NEEDLE", ".py")
+        search = pack._TextSearch(root, "NEEDLE", ".py", limit=10 ** 9)
+        t_new, new = timed(search.run)
+        print(f"legacy  : {t_old:8.3f}s  {len(old)} hits")
+        print(f"engine  : {t_new:8.3f}s  {len(new)} hits  ({search.workers} workers)")
+        print(f"speedup : {t_old / max(t_new, 1e-9):.2f}x")
+        missed = sorted(set(new) - set(old))
+        if missed:
+            print(f"legacy missed {len(missed)} file(s), e.g. {missed[0]}")
+    finally:
+        if made and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+def bench_ls(args):
+    root = args.root or tempfile.mkdtemp(prefix="ai1bench_")
+    made = not args.root
+    try:
+        if made:
+            print(f"generating {args.entries} entries in {root} …")
+            make_flat_dir(root, args.entries)
+        t_old, old = timed(legacy_ls, root)
+        pack._LS_CURSORS.clear()
+        t_new, new = timed(pack._ls_rows, root)
+        t_page, _ = timed(pack._ls_rows, root)
+        print(f"ls legacy     : {t_old:8.3f}s  {len(old)} entries")
+        print(f"ls scandir    : {t_new:8.3f}s  {len(new)} entries  ({t_old / max(t_new, 1e-9):.2f}x)")
+        print(f"ls next page  : {t_page * 1000:8.3f}ms (cursor reuse)")
+        t_old, old = timed(legacy_tree, root, 1)
+        t_new, new = timed(lambda: list(pack._iter_tree(root, 1, 0)))
+        gen = pack._iter_tree(root, 1, 0)
+        t_first, _ = timed(lambda: [next(gen) for _ in range(200)])
+        print(f"tree legacy   : {t_old:8.3f}s  {len(old)} lines")
+        print(f"tree generator: {t_new:8.3f}s  {len(new)} lines  ({t_old / max(t_new, 1e-9):.2f}x)")
+        print(f"tree first 200: {t_first * 1000:8.3f}ms")
+    finally:
+        if made and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+def bench_scan(args):
+    socks = open_listeners(args.listeners)
+    fsocks, filtered = open_filtered(args.filtered)
+    try:
+        open_ports = [s.getsockname()[1] for s in socks]
+        lo = min(open_ports)
+        ports = sorted(set(open_ports) | set(filtered) | set(range(lo, lo + args.ports)))
+        tcp = pack._net_ops()["net-tcpcheck"]
+        t_old, old = timed(lambda: [p for p in ports if tcp(None, ["127.0.0.1", str(p)]) == "OPEN"])
+        sc = pack._PortScan(["127.0.0.1"], ports, args.concurrency, 2.5)
+        t_new, new = timed(sc.run)
+        found = sorted(p for _, p, st, _ in new if st == "open")
+        print(f"{len(ports)} ports: {len(open_ports)} listening, {len(filtered)} filtered, rest closed")
+        print(f"sequential net-tcpcheck: {t_old:8.3f}s  {len(old)} open")
+        print(f"net-scan (asyncio)     : {t_new:8.3f}s  {len(found)} open  (concurrency {args.concurrency})")
+        print(f"speedup                : {t_old / max(t_new, 1e-9):.2f}x")
+    finally:
+        for s in socks + fsocks:
+            s.close()
+
+def bench_shell(args):
+    profile = args.profile or ("powershell" if os.name == "nt" else "bash")
+    base = pack._resolve_gitbash() if profile == "gitbash" else pack.SHELLS.get(profile)
+    if not base or not pack._shell_argv(profile):
+        print(f"{profile} not available")
+        return
+    cmd = "echo ai1"
+    t_old, _ = timed(lambda: [pack._run_capture(base + [cmd]) for _ in range(args.runs)])
+    pool = pack._shell_pool(profile)
+    t_warm, _ = timed(pool.warm)
+    t_new, outs = timed(lambda: [pool.run(cmd) for _ in range(args.runs)])
+    ok = sum(1 for out, code in outs if out.strip() == "ai1" and code == 0)
+    pool.restart()
+    print(f"{args.runs} x '{cmd}' on {profile}")
+    print(f"spawn per call : {t_old:8.3f}s  ({t_old / args.runs * 1000:.1f} ms/run)")
+    print(f"pool warm-up   : {t_warm:8.3f}s  (once, at plugin load)")
+    print(f"persistent pool: {t_new:8.3f}s  ({t_new / args.runs * 1000:.1f} ms/run, {ok}/{args.runs} ok)")
+    print(f"speedup        : {t_old / max(t_new, 1e-9):.1f}x")
+
+def legacy_load_state(path):
+    # the pre-store _load_state: open + parse on every call
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f) or {}
+
+def legacy_save_state(path, d):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(d, f, indent=2, ensure_ascii=False)
+
+def bench_state(args):
+    root = tempfile.mkdtemp(prefix="ai1bench_")
+    try:
+        path = os.path.join(root, "bec_theme_state.json")
+        state = {"type": "customgen", "icon": os.path.join(root, "icon.png"),
+                 "config": {f"k{i}": f"#{i:06x}" for i in range(args.keys)}}
+        legacy_save_state(path, state)
+        loads = args.ticks * args.sessions
+        t_old, _ = timed(lambda: [legacy_load_state(path) for _ in range(loads)])
+        st = bec_state.JsonStore(path)
+        t_new, _ = timed(lambda: [st.load() for _ in range(loads)])
+        print(f"{loads} state loads ({args.ticks} ticks x {args.sessions} sessions)")
+        print(f"legacy  : {t_old * 1000:8.2f}ms  {loads} disk reads")
+        print(f"store   : {t_new * 1000:8.2f}ms  {st.reads} disk reads, {st.hits} cache hits")
+        t_old, _ = timed(lambda: [legacy_save_state(path, dict(state, n=i)) for i in range(args.saves)])
+        t_new, _ = timed(lambda: [st.save(dict(state, n=i)) for i in range(args.saves)])
+        st.flush()
+        print(f"{args.saves} saves in a burst")
+        print(f"legacy  : {t_old * 1000:8.2f}ms  {args.saves} file writes (in place)")
+        print(f"store   : {t_new * 1000:8.2f}ms  {st.writes} file write(s) (tmp + os.replace)")
+        compact = bec_state.JsonStore(os.path.join(root, "compact.json"), compact=True)
+        compact.save(state, now=True)
+        print(f"size    : {os.path.getsize(path)} B indent=2, {os.path.getsize(compact.path)} B compact")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+ECHO_SERVER = r"""
+import sys, socket
+# line echo server; "spam" floods stdout, "crash" exits with code 3
+srv = socket.create_server(("127.0.0.1", int(sys.argv[1])))
+print("listening", sys.argv[1], flush=True)
+while True:
+    conn, _ = srv.accept()
+    with conn, conn.makefile("rwb") as f:
+        for line in f:
+            cmd = line.strip()
+            if cmd == b"crash":
+                print("crash requested", flush=True)
+                sys.exit(3)
+            if cmd == b"spam":
+                for i in range(2000):
+                    print(f"spam line {i:05d} " + "x" * 60)
+                sys.stdout.flush()
+            f.write(line)
+            f.flush()
+"""
+
+def echo_call(port, line, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=2) as s:
+                s.sendall(line.encode() + b"\n")
+                return s.makefile("rb").readline().decode().strip()
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.05)
+
+def wait_for(cond, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        v = cond()
+        if v:
+            return v
+        time.sleep(0.02)
+    return None
+
+def bench_supervise(args):
+    # IDSPcommands start|status|logs|stop against a throwaway server_apps folder
+    root = tempfile.mkdtemp(prefix="ai1bench_")
+    saved = {k: getattr(pack, k) for k in ("SERVER_DIR", "SERVER_LOG_DIR", "MANIFEST_PATH", "_MANIFEST", "SUPERVISE_LOG_MAX")}
+    pack.SERVER_DIR = root
+    pack.SERVER_LOG_DIR = os.path.join(root, "logs")
+    pack.MANIFEST_PATH = os.path.join(root, "manifest.json")
+    pack._MANIFEST = bec_state.store(pack.MANIFEST_PATH, default=lambda: {"apps": {}})
+    pack.SUPERVISE_LOG_MAX = args.log_kb * 1024
+    failed = []
+
+    def check(label, ok, detail=""):
+        print(f"{'PASS' if ok else 'FAIL'}  {label}{'  ' + detail if detail else ''}")
+        if not ok:
+            failed.append(label)
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    app = os.path.join(root, "echo_server.py")
+    with open(app, "w", encoding="utf-8") as f:
+        f.write(ECHO_SERVER)
+    host = MockHost()
+    pack._idspcommands(host)
+    ctx = MockCtx(host)
+    idsp = lambda *a: host.commands["IDSPcommands"]["handler"](ctx, list(a))  # noqa: E731
+    try:
+        print(idsp("add", "echo", app).splitlines()[0])
+        print(idsp("start", "echo", str(port)))
+        m = pack._SUPERVISED["echo"]
+        check("echo round trip", echo_call(port, "hello") == "hello")
+        rec = pack._load_manifest().get("running", {}).get("echo", {})
+        check("pid in manifest", rec.get("pid") == m.pid(), f"manifest {rec.get('pid')}, live {m.pid()}")
+
+        # crash twice: restarts wait 1 s, then 2 s (exponential backoff)
+        gaps = []
+        for n in (1, 2):
+            old = m.pid()
+            t0 = time.perf_counter()
+            try:
+                echo_call(port, "crash", timeout=2)
+            except OSError:
+                pass
+            new = wait_for(lambda: m.pid() not in (None, old) and m.pid(), timeout=10)
+            gaps.append(time.perf_counter() - t0)
+            check(f"restart #{n}", bool(new) and m.restarts == n, f"pid {old} -> {new}, gap {gaps[-1]:.2f}s")
+        check("backoff doubles", len(gaps) == 2 and 0.9 <= gaps[0] < 1.9 and 1.9 <= gaps[1] < 3.5,
+              " / ".join(f"{g:.2f}s" for g in gaps))
+        rec = pack._load_manifest().get("running", {}).get("echo", {})
+        check("manifest pid follows restart", rec.get("pid") == m.pid(), f"manifest {rec.get('pid')}, live {m.pid()}")
+
+        # flood stdout past SUPERVISE_LOG_MAX: the log must rotate
+        echo_call(port, "spam")
+        rotated = wait_for(lambda: os.path.isfile(m.log_path + ".1"), timeout=5)
+        size = os.path.getsize(m.log_path) if os.path.isfile(m.log_path) else 0
+        check("log rotated", bool(rotated) and size <= pack.SUPERVISE_LOG_MAX + 65536,
+              f"{os.path.basename(m.log_path)} {size} B, limit {pack.SUPERVISE_LOG_MAX} B")
+        check("logs tail", "spam line" in idsp("logs", "echo", "5"))
+
+        status = idsp("status", "echo")
+        print(status)
+        check("status CPU/RSS", "CPU" in status and "RSS" in status and "restarts 2" in status)
+
+        print(idsp("stop", "echo"))
+        check("stopped", m.pid() is None and m.state == "stopped", m.state)
+        check("manifest cleared", "echo" not in pack._load_manifest().get("running", {}))
+    finally:
+        m = pack._SUPERVISED.pop("echo", None)
+        if m is not None:
+            m.stop()
+        pack._MANIFEST.flush()
+        for k, v in saved.items():
+            setattr(pack, k, v)
+        shutil.rmtree(root, ignore_errors=True)
+    if failed:
+        print(f"{len(failed)} check(s) failed: {', '.join(failed)}")
+        return 1
+    print("all checks passed")
+    return 0
+
+STARTUP_PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import ai1cmd_pack as pack
+t1 = time.perf_counter()
+
+class Host:
+    def __init__(self):
+        self.n = 0
+    def register_command(self, **kw):
+        self.n += 1
+
+host = Host()
+pack._warm_shells = lambda: None
+pack.register(host)
+t2 = time.perf_counter()
+first = {}
+for group, ops in pack._OP_TABLE.items():
+    t = time.perf_counter()
+    pack._op_handler(ops[0].name)
+    first[group] = (time.perf_counter() - t) * 1000
+print(json.dumps({"import": (t1 - t0) * 1000, "register": (t2 - t1) * 1000,
+                  "commands": host.n, "first": first,
+                  "loaded": [m for m in ("psutil", "requests", "shutil", "platform", "base64") if m in sys.modules]}))
+"""
+
+def bench_startup(args):
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", STARTUP_PROBE], cwd=PMF_DIR,
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    med = lambda key: statistics.median(r[key] for r in runs)  # noqa: E731
+    last = runs[-1]
+    print(f"{args.runs} cold starts, median")
+    print(f"import ai1cmd_pack : {med('import'):8.2f}ms")
+    print(f"register(host)     : {med('register'):8.2f}ms  ({last['commands']} commands)")
+    print(f"plugin load total  : {med('import') + med('register'):8.2f}ms")
+    print("first call per group (handler factory, paid once):")
+    for group in last["first"]:
+        print(f"  {group:<5}: {statistics.median(r['first'][group] for r in runs):8.3f}ms")
+    print(f"modules loaded after first calls: {', '.join(last['loaded']) or '-'}")
+
+BENCH_DIR = os.path.join(pack.DATA_DIR, "bench")
+
+class MockHost:
+    """Stand-in for the AI1 host, with its own command index, handler map and perf table."""
+
+    def __init__(self):
+        self.commands = {}
+        self.cmd_index = pack._CmdIndex()
+        self.handlers = {}
+        self.perf_stats = {}
+
+    def register_command(self, **kw):
+        self.commands[kw["name"]] = kw
+
+    def all_names(self):
+        return list(self.commands)
+
+class MockCtx:
+    """Stand-in for a command ctx: in-memory state, printed lines collected, host names as app.cmds."""
+
+    def __init__(self, host):
+        self.state = {}
+        self.printed = []
+        self.app = type("App", (), {})()
+        self.app.cmds = host
+
+    def state_get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def state_set(self, key, value):
+        self.state[key] = value
+
+    def print(self, text):
+        self.printed.append(text)
+
+def suite_fixture(root, files, big_mb):
+    # tree/: small .py files, flat/: one wide folder, big.log: <big_mb> MB of lines
+    tree = os.path.join(root, "tree")
+    for n in range(files):
+        d = os.path.join(tree, f"pkg{n // 2000:02d}", f"mod{n // 100:04d}")
+        if n % 100 == 0:
+            os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, f"f{n:06d}.py"), "w", encoding="utf-8") as f:
+            f.write("import os\n" * 20 + ("x = 'NEEDLE'\n" if n % 97 == 0 else ""))
+    flat = os.path.join(root, "flat")
+    os.makedirs(flat, exist_ok=True)
+    for n in range(files):
+        open(os.path.join(flat, f"e{n:06d}.txt"), "w").close()
+    big = os.path.join(root, "big.log")
+    line = ("%08d " + "x" * 90 + "\n")
+    with open(big, "w", encoding="ascii") as f:
+        for i in range(big_mb * 1024 * 1024 // 100):
+            f.write(line % i)
+    return {"root": root, "tree": tree, "flat": flat, "big": big}
+
+def suite_cases(fx, text):
+    # (label, command, argv, input bytes for MB/s or 0, setup or None)
+    def cold_hash():
+        with pack._HASH_LOCK:
+            pack._HASH_CACHE.pop(os.path.abspath(fx["big"]), None)
+
+    def cold_ls():
+        flat = os.path.abspath(fx["flat"])
+        for k in [k for k in list(pack._LS_CURSORS) if k[0] == flat]:
+            pack._LS_CURSORS.pop(k, None)
+    big_size = os.path.getsize(fx["big"])
+    return [
+        ("file-ls flat", "file-ls", [fx["flat"]], 0, cold_ls),
+        ("file-tree d2", "file-tree", [fx["tree"], "2"], 0, None),
+        ("file-findname substr", "file-findname", [fx["tree"], "f0042"], 0, None),
+        ("file-findname glob", "file-findname", [fx["tree"], "f00*1.py"], 0, None),
+        ("file-findtext", "file-findtext", [fx["tree"], "NEEDLE", ".py", "--wait"], 0, None),
+        ("file-size cached", "file-size", [fx["tree"]], 0, None),
+        ("file-size fresh", "file-size", [fx["tree"], "--fresh"], 0, None),
+        ("file-tail 100", "file-tail", [fx["big"], "100"], 0, None),
+        ("file-sha256 cold", "file-sha256", [fx["big"], "--wait"], big_size, cold_hash),
+        ("file-sha256 cached", "file-sha256", [fx["big"], "--wait"], 0, None),
+        ("text-upper", "text-upper", [text], len(text), None),
+        ("text-words", "text-words", [text], len(text), None),
+        ("text-b64e", "text-b64e", [text], len(text), None),
+        ("text-regexfind", "text-regexfind", [r"w\d+7\b", text], len(text), None),
+        ("pack-list", "pack-list", [], 0, None),
+        ("pack-list prefix", "pack-list", ["net-port-"], 0, None),
+        ("pack-list did-you-mean", "pack-list", ["fiel-tre"], 0, None),
+    ]
+
+def suite_forget(root):
+    root = os.path.abspath(root)
+    under = lambda p: p == root or p.startswith(root + os.sep)  # noqa: E731
+    with pack._HASH_LOCK:
+        for k in [k for k in pack._HASH_CACHE if under(k)]:
+            del pack._HASH_CACHE[k]
+    with pack._DIRSIZE_LOCK:
+        for k in [k for k in pack._DIRSIZE_CACHE if under(k)]:
+            del pack._DIRSIZE_CACHE[k]
+    for k in [k for k in list(pack._LS_CURSORS) if under(k[0])]:
+        pack._LS_CURSORS.pop(k, None)
+
+def run_suite(repeat=5, warmup=1, files=5000, big_mb=32, text_kb=1024, only="", progress=None):
+    host = MockHost()
+    pack._register_commands(host)
+    ctx = MockCtx(host)
+    root = tempfile.mkdtemp(prefix="ai1bench_")
+    results = []
+    try:
+        t0 = time.perf_counter()
+        fx = suite_fixture(root, files, big_mb)
+        words = " ".join(f"w{i}" for i in range(text_kb * 1024 // 6))
+        if progress:
+            progress(f"fixture: {files} files + {files} flat entries + {big_mb} MB log in {time.perf_counter() - t0:.1f}s")
+        for label, cmd, argv, nbytes, setup in suite_cases(fx, words[: text_kb * 1024]):
+            if only and not label.startswith(only):
+                continue
+            fn = host.commands[cmd]["handler"]
+            for _ in range(warmup):
+                if setup: setup()
+                fn(ctx, list(argv))
+            ms = []
+            out = ""
+            for _ in range(repeat):
+                if setup: setup()
+                t = time.perf_counter()
+                out = fn(ctx, list(argv))
+                ms.append((time.perf_counter() - t) * 1000)
+                if pack._job_cancelled():
+                    break
+            ms.sort()
+            mean = sum(ms) / len(ms)
+            row = {
+                "case": label, "runs": len(ms), "mean_ms": mean, "min_ms": ms[0],
+                "p50_ms": pack._percentile(ms, 50), "p95_ms": pack._percentile(ms, 95),
+                "ops_s": 1000.0 / mean if mean else 0.0,
+                "mb_s": (nbytes / 1048576) / (mean / 1000) if nbytes and mean else 0.0,
+                "out_chars": len(out) if isinstance(out, str) else 0,
+            }
+            results.append(row)
+            if progress:
+                progress(f"{label}: {mean:.2f} ms")
+            if pack._job_cancelled():
+                break
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        suite_forget(root)
+    return {
+        "pack": pack.PACK_NAME, "time": pack._now(), "python": sys.version.split()[0],
+        "platform": sys.platform, "cpus": os.cpu_count(),
+        "params": {"repeat": repeat, "warmup": warmup, "files": files, "big_mb": big_mb, "text_kb": text_kb},
+        "results": results,
+    }
+
+def save_report(report):
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    prev = None
+    older = sorted(f for f in os.listdir(BENCH_DIR) if f.startswith("bench-") and f.endswith(".json"))
+    for fn in reversed(older):
+        try:
+            with open(os.path.join(BENCH_DIR, fn), "r", encoding="utf-8") as f:
+                old = json.load(f)
+        except Exception:
+            continue
+        if old.get("params") == report["params"]:
+            prev = old
+            break
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+    path = os.path.join(BENCH_DIR, f"bench-{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path, prev
+
+def report_table(report, prev=None):
+    before = {r["case"]: r for r in (prev or {}).get("results", [])}
+    out = [f"{'CASE':<24}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'ops/s':>10}{'MB/s':>9}{'vs last':>9}"]
+    for r in report["results"]:
+        old = before.get(r["case"])
+        delta = f"{(r['mean_ms'] / old['mean_ms'] - 1) * 100:+7.1f}%" if old and old.get("mean_ms") else ""
+        mbs = f"{r['mb_s']:9.1f}" if r["mb_s"] else f"{'':9}"
+        out.append(f"{r['case']:<24}{r['mean_ms']:10.2f}{r['p50_ms']:10.2f}{r['p95_ms']:10.2f}{r['ops_s']:10.1f}{mbs}{delta:>9}")
+    p = report["params"]
+    out.append(f"(repeat {p['repeat']}, warmup {p['warmup']}, {p['files']} files, {p['big_mb']} MB log, {p['text_kb']} KB text)")
+    return "\n".join(out)
+
+def bench_suite(args):
+    report = run_suite(repeat=args.repeat, warmup=args.warmup, files=args.files, big_mb=args.mb,
+                       text_kb=args.text_kb, only=args.only, progress=print if args.verbose else None)
+    path, prev = save_report(report)
+    print(report_table(report, prev))
+    print(f"saved: {path}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ai1cmd_pack benchmarks")
+    sub = ap.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("findtext", help="parallel file-findtext vs legacy os.walk scan")
+    p.add_argument("--files", type=int, default=100000)
+    p.add_argument("--root", default="", help="search an existing tree instead of generating one")
+    p.add_argument("--keep", action="store_true", help="keep the generated tree")
+    p.set_defaults(fn=bench_findtext)
+
+    p = sub.add_parser("ls", help="scandir file-ls / file-tree vs listdir+isdir")
+    p.add_argument("--entries", type=int, default=50000)
+    p.add_argument("--root", default="", help="list an existing folder instead of generating one")
+    p.add_argument("--keep", action="store_true", help="keep the generated folder")
+    p.set_defaults(fn=bench_ls)
+
+    p = sub.add_parser("scan", help="net-scan vs sequential net-tcpcheck on 127.0.0.1")
+    p.add_argument("--listeners", type=int, default=20)
+    p.add_argument("--filtered", type=int, default=4, help="listeners that time out like firewalled ports")
+    p.add_argument("--ports", type=int, default=2000, help="ports probed in total (rest are closed)")
+    p.add_argument("--concurrency", type=int, default=200)
+    p.set_defaults(fn=bench_scan)
+
+    p = sub.add_parser("shell", help="persistent shell pool vs spawn-per-call AI1cmd shell run")
+    p.add_argument("--profile", default="", help="powershell|pwsh|cmd|bash|gitbash (default: OS shell)")
+    p.add_argument("--runs", type=int, default=100)
+    p.set_defaults(fn=bench_shell)
+
+    p = sub.add_parser("state", help="bec_state store vs per-call JSON load/save")
+    p.add_argument("--ticks", type=int, default=24, help="_EarlyPatch ticks per session")
+    p.add_argument("--sessions", type=int, default=100)
+    p.add_argument("--saves", type=int, default=200)
+    p.add_argument("--keys", type=int, default=40, help="entries in the fake custom theme config")
+    p.set_defaults(fn=bench_state)
+
+    p = sub.add_parser("startup", help="plugin import + register cost with a mock host")
+    p.add_argument("--runs", type=int, default=10)
+    p.set_defaults(fn=bench_startup)
+
+    p = sub.add_parser("supervise", help="IDSPcommands start/restart/logs/status/stop on a local echo server")
+    p.add_argument("--log-kb", type=int, default=64, help="log size that triggers rotation")
+    p.set_defaults(fn=bench_supervise)
+
+    p = sub.add_parser("suite", help="hot-path suite on generated data, JSON results under data/bench")
+    p.add_argument("only", nargs="?", default="", help="run only cases whose label starts with this")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--warmup", type=int, default=1)
+    p.add_argument("--files", type=int, default=5000)
+    p.add_argument("--mb", type=int, default=32, help="size of the generated log for tail/sha256")
+    p.add_argument("--text-kb", type=int, default=1024, help="input size for the text-* cases")
+    p.add_argument("-v", "--verbose", action="store_true", help="print progress lines")
+    p.set_defaults(fn=bench_suite)
+
+    args = ap.parse_args(argv)
+    return args.fn(args) or 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,314 @@
+# BetterEditPMF/bench_theme.py
+# Benchmarks for BEC_ThemePack_AllInOne (needs PySide6; runs offscreen, no AI1 needed).
+# Run (PowerShell):
+#   cd "C:\Users\lrazy\Documents\All in One 1.0.0\BetterEditPMF"
+#   python bench_theme.py switch --switches 100 --widgets 300
+#   python bench_theme.py preview --steps 22
+#   python bench_theme.py images --frames 30
+#   python bench_theme.py library --themes 300
+
+import os
+import sys
+import time
+import shutil
+import json
+import argparse
+import tempfile
+
+PMF_DIR = os.path.abspath(os.path.dirname(__file__))
+if PMF_DIR not in sys.path:
+    sys.path.insert(0, PMF_DIR)
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import QtCore, QtGui, QtWidgets  # noqa: E402
+
+APP = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+import bec_state  # noqa: E402
+import BEC_ThemePack_AllInOne as theme  # noqa: E402
+
+def make_window(widgets, title="bench"):
+    # one main window with <widgets> mixed controls, like a busy AI1 tab
+    win = QtWidgets.QMainWindow()
+    win.setWindowTitle(title)
+    body = QtWidgets.QWidget()
+    grid = QtWidgets.QGridLayout(body)
+    kinds = (QtWidgets.QLabel, QtWidgets.QPushButton, QtWidgets.QLineEdit, QtWidgets.QComboBox)
+    for i in range(widgets):
+        w = kinds[i % len(kinds)]()
+        if hasattr(w, "setText"):
+            w.setText(f"item {i}")
+        grid.addWidget(w, i // 20, i % 20)
+    scroll = QtWidgets.QScrollArea()
+    scroll.setWidget(body)
+    win.setCentralWidget(scroll)
+    win.resize(1200, 800)
+    win.show()
+    APP.processEvents()
+    return win
+
+def legacy_apply(qss):
+    # the pre-engine _apply_stylesheet: style reset + app-wide sheet on every switch
+    tops = list(APP.topLevelWidgets())
+    for w in tops:
+        w.setUpdatesEnabled(False)
+    try:
+        APP.setStyle("Fusion")
+        APP.setStyleSheet(qss)
+    finally:
+        for w in tops:
+            w.setUpdatesEnabled(True)
+            w.update()
+
+def run_switches(apply, keys, switches):
+    t0 = time.perf_counter()
+    for i in range(switches):
+        key = keys[i % len(keys)]
+        apply(key)
+        APP.processEvents()
+    return time.perf_counter() - t0
+
+def bench_switch(args):
+    main = make_window(args.widgets, "main")
+    side = make_window(args.widgets // 10, "side")
+    side.setObjectName("side")
+    keys = list(theme.THEMES)
+    qss = {k: theme.THEMES[k]["qss"] for k in keys}
+
+    t_old = run_switches(lambda k: legacy_apply(qss[k]), keys, args.switches)
+    APP.setStyleSheet("")
+    theme._APPLY_TIMES.clear()
+    t_new = run_switches(lambda k: theme._apply_stylesheet(APP, qss[k], label=k), keys, args.switches)
+    APP.setStyleSheet("")
+    t_scoped = run_switches(lambda k: theme._apply_stylesheet(APP, qss[k], scope="side", label=k), keys, args.switches)
+
+    cfgs = [dict(bg="#101010", fg="#EEEEEE", accent="#5AA0FF", radius=r, font="Segoe UI") for r in range(6, 12)]
+    t0 = time.perf_counter()
+    for i in range(args.switches * 10):
+        theme._gen_custom_qss(cfgs[i % len(cfgs)])
+    t_gen = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for i in range(args.switches * 10):
+        theme._qss_from_custom(cfgs[i % len(cfgs)])
+    t_cached = time.perf_counter() - t0
+
+    n = args.switches
+    print(f"{n} switches over {len(keys)} themes, {args.widgets} + {args.widgets // 10} widgets")
+    print(f"legacy (setStyle + app sheet) : {t_old:8.3f}s  ({t_old / n * 1000:.1f} ms/switch)")
+    print(f"engine (Fusion kept)          : {t_new:8.3f}s  ({t_new / n * 1000:.1f} ms/switch, {t_old / max(t_new, 1e-9):.2f}x)")
+    print(f"scoped to 'side' window       : {t_scoped:8.3f}s  ({t_scoped / n * 1000:.1f} ms/switch)")
+    print(f"custom QSS x{n * 10}: generate {t_gen * 1000:.1f} ms, cached {t_cached * 1000:.1f} ms")
+    main.close()
+    side.close()
+
+def bench_preview(args):
+    ed = theme.ThemeEditor(APP)
+    ed.cmb_presets.setCurrentIndex(ed.cmb_presets.findData("__custom__"))
+    while ed._warmer.isActive():
+        APP.processEvents()
+    t0 = time.perf_counter()
+    for i in range(args.steps):
+        ed.cfg["radius"] = 6 + i % 23
+        ed.qss_view.setPlainText(theme._gen_custom_qss(ed.cfg))
+    t_old = time.perf_counter() - t0
+
+    r0 = theme._PREVIEW_STATS["renders"]
+    t0 = time.perf_counter()
+    for i in range(args.steps):
+        ed.spin_radius.setValue(6 + (i * 5) % 23)
+        APP.processEvents()
+    while ed._debounce.isActive():
+        APP.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 10)
+    t_new = time.perf_counter() - t0 - theme.PREVIEW_DEBOUNCE_MS / 1000
+    renders = theme._PREVIEW_STATS["renders"] - r0
+
+    # preset flips: first pass renders each built-in thumbnail, second pass is cache hits
+    theme._PREVIEWS.clear()
+    idx = [ed.cmb_presets.findData(k) for k in theme.THEMES]
+    t0 = time.perf_counter()
+    for i in idx:
+        ed.cmb_presets.setCurrentIndex(i)
+    t_cold = time.perf_counter() - t0
+    ed.cmb_presets.setCurrentIndex(ed.cmb_presets.findData("__custom__"))
+    t0 = time.perf_counter()
+    for i in idx:
+        ed.cmb_presets.setCurrentIndex(i)
+    t_warm = time.perf_counter() - t0
+
+    n = len(idx)
+    print(f"radius drag, {args.steps} ticks")
+    print(f"per-tick regenerate (old)     : {t_old * 1000:8.1f} ms, {args.steps} QSS rebuilds, no preview")
+    print(f"debounced (excl. {theme.PREVIEW_DEBOUNCE_MS} ms wait)  : {t_new * 1000:8.1f} ms, {renders} preview render(s)")
+    print(f"preset flips over {n} built-ins: first {t_cold / n * 1000:.1f} ms/flip, cached {t_warm / n * 1000:.2f} ms/flip")
+    ed.close()
+
+def make_image(path, w, h):
+    img = QtGui.QImage(w, h, QtGui.QImage.Format.Format_RGB32)
+    p = QtGui.QPainter(img)
+    g = QtGui.QLinearGradient(0, 0, w, h)
+    g.setColorAt(0, QtGui.QColor("#203040"))
+    g.setColorAt(1, QtGui.QColor("#A05030"))
+    p.fillRect(img.rect(), g)
+    p.end()
+    img.save(path)
+
+def bench_images(args):
+    tmp = tempfile.mkdtemp(prefix="bec-img-")
+    theme.IMG_CACHE_DIR = os.path.join(tmp, "img_cache")
+    try:
+        bg = os.path.join(tmp, "bg.png")
+        make_image(bg, args.bg_w, args.bg_h)
+        icon = os.path.join(tmp, "icon.png")
+        make_image(icon, 512, 512)
+        win = make_window(args.widgets, "main")
+        cfg = dict(bg="#101010", fg="#EEEEEE", accent="#5AA0FF", radius=10, font="Segoe UI", bg_image=bg)
+
+        # old generator: url() straight to the full-resolution file
+        raw = theme._gen_custom_qss(dict(cfg, bg_image="")) + (
+            f"QMainWindow {{ background-image: url('{bg.replace(os.sep, '/')}'); "
+            "background-position:center; background-repeat:no-repeat; }\n")
+        t0 = time.perf_counter()
+        APP.setStyleSheet(raw)
+        APP.processEvents()
+        win.repaint()
+        first_raw = (time.perf_counter() - t0) * 1000
+        f_raw = theme._frame_probe(win, args.frames)
+
+        t0 = time.perf_counter()
+        qss = theme._qss_from_custom(cfg)
+        t_pipe = (time.perf_counter() - t0) * 1000
+        APP.setStyleSheet("")
+        APP.processEvents()
+        t0 = time.perf_counter()
+        APP.setStyleSheet(qss)
+        APP.processEvents()
+        win.repaint()
+        first_new = (time.perf_counter() - t0) * 1000
+        scaled = QtGui.QImageReader(theme._bg_file(bg)).size()
+        f_new = theme._frame_probe(win, args.frames)
+        theme._QSS_CACHE.clear()
+        t0 = time.perf_counter()
+        theme._qss_from_custom(cfg)
+        t_again = (time.perf_counter() - t0) * 1000
+
+        # icons: old = QIcon(path) + set on every window per call; new = cached variants, unchanged icons skipped
+        t0 = time.perf_counter()
+        for _ in range(args.frames):
+            ico = QtGui.QIcon(icon)
+            APP.setWindowIcon(ico)
+            for w in APP.topLevelWidgets():
+                w.setWindowIcon(ico)
+        i_old = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        theme._apply_icon(APP, icon)
+        i_first = (time.perf_counter() - t0) * 1000
+        theme._ICONS.clear()
+        t0 = time.perf_counter()
+        theme._apply_icon(APP, icon)
+        i_disk = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        for _ in range(args.frames):
+            theme._apply_icon(APP, icon)
+        i_new = (time.perf_counter() - t0) * 1000
+
+        print(f"bg {args.bg_w}x{args.bg_h} on a {win.width()}x{win.height()} window, {args.frames} repaints each")
+        mb = lambda w, h: w * h * 4 / 1e6  # noqa: E731
+        print(f"raw url()   : apply+paint {first_raw:7.1f} ms, repaint avg {f_raw['avg']:.2f} ms, "
+              f"p95 {f_raw['p95']:.2f} ms, pixmap {mb(args.bg_w, args.bg_h):.1f} MB")
+        print(f"pre-scaled  : apply+paint {first_new:7.1f} ms, repaint avg {f_new['avg']:.2f} ms, "
+              f"p95 {f_new['p95']:.2f} ms, pixmap {mb(scaled.width(), scaled.height()):.1f} MB")
+        print(f"pipeline    : {t_pipe:.1f} ms first build (decode + scale + save), {t_again:.2f} ms rebuild from cache")
+        print(f"icon        : first {i_first:.1f} ms (variants written), next start {i_disk:.2f} ms, "
+              f"x{args.frames} {i_new:.2f} ms cached vs {i_old:.2f} ms new QIcon per call")
+        APP.setStyleSheet("")
+        win.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def bench_library(args):
+    tmp = tempfile.mkdtemp(prefix="bec-lib-")
+    root = os.path.join(tmp, "themes")
+    index = os.path.join(tmp, "theme_index.json")
+    os.makedirs(root)
+    try:
+        for i in range(args.themes):
+            cfg = dict(bg="#101010", fg="#EEEEEE", accent=f"#{i * 2654435761 % 0xFFFFFF:06X}", radius=6 + i % 20)
+            data = {"type": "bec_preset", "label": f"Community {i:04d}", "config": cfg, "qss": theme._gen_custom_qss(cfg)}
+            with open(os.path.join(root, f"community-{i:04d}.json"), "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+
+        def restart():
+            bec_state.flush_all()
+            bec_state._STORES.pop(os.path.normcase(os.path.abspath(index)), None)
+            return theme._ThemeLibrary(root, index)
+
+        # eager: what loading every file into THEMES at import would cost
+        t0 = time.perf_counter()
+        for fn in sorted(os.listdir(root)):
+            with open(os.path.join(root, fn), encoding="utf-8") as f:
+                json.load(f)
+        t_eager = time.perf_counter() - t0
+
+        lib = restart()
+        t0 = time.perf_counter()
+        lib.refresh()
+        t_cold = time.perf_counter() - t0
+        parsed = lib.stats["parsed"]
+
+        lib = restart()
+        t0 = time.perf_counter()
+        qss = lib.qss("community-0007")
+        t_start = time.perf_counter() - t0
+        assert qss
+
+        t0 = time.perf_counter()
+        lib.refresh()
+        t_same = time.perf_counter() - t0
+
+        for i in (1, 2, 3):
+            with open(os.path.join(root, f"community-{i:04d}.json"), "a", encoding="utf-8") as f:
+                f.write("\n")
+        t0 = time.perf_counter()
+        added, changed, removed = lib.refresh()
+        t_incr = time.perf_counter() - t0
+
+        print(f"{args.themes} theme files")
+        print(f"eager parse of every file   : {t_eager * 1000:8.1f} ms")
+        print(f"first index build           : {t_cold * 1000:8.1f} ms ({parsed} files parsed)")
+        print(f"start + apply one theme     : {t_start * 1000:8.1f} ms (index + 1 file, no scan)")
+        print(f"refresh, nothing changed    : {t_same * 1000:8.1f} ms")
+        print(f"refresh, 3 files touched    : {t_incr * 1000:8.1f} ms (+{added} ~{changed} -{removed})")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="BEC theme pack benchmarks (offscreen Qt)")
+    sub = ap.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("switch", help="theme apply: legacy vs cached engine vs scoped")
+    p.add_argument("--switches", type=int, default=100)
+    p.add_argument("--widgets", type=int, default=300)
+    p.set_defaults(fn=bench_switch)
+
+    p = sub.add_parser("preview", help="ThemeEditor: debounced preview vs per-tick regenerate")
+    p.add_argument("--steps", type=int, default=22)
+    p.set_defaults(fn=bench_preview)
+
+    p = sub.add_parser("images", help="bg image: raw url() vs pre-scaled copy; icon variants")
+    p.add_argument("--frames", type=int, default=30)
+    p.add_argument("--widgets", type=int, default=40)
+    p.add_argument("--bg-w", type=int, default=4000)
+    p.add_argument("--bg-h", type=int, default=3000)
+    p.set_defaults(fn=bench_images)
+
+    p = sub.add_parser("library", help="theme library: index build, start, incremental refresh")
+    p.add_argument("--themes", type=int, default=300)
+    p.set_defaults(fn=bench_library)
+
+    args = ap.parse_args(argv)
+    args.fn(args)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())